@@ -1,8 +1,9 @@
 import os
-from langchain.vectorstores.chroma import Chroma 
-from langchain_openai import AzureOpenAIEmbeddings
-from openai import AzureOpenAI
+import threading
+import registry
+from registry import get_chat_client, get_embeddings
 from dotenv import load_dotenv
+from versioned_store import VersionedStore
  
 CHROMA_PATH = "chroma_finance_docs"
 load_dotenv()
@@ -19,31 +20,54 @@ embedding_endpoint_url = os.environ.get("ADA_AZURE_OPENAI_ENDPOINT")
 embedding_api_key = os.environ.get("ADA_AZURE_OPENAI_API_KEY")
 embedding_deployment_name = os.environ.get("ADA_AZURE_OPENAI_DEPLOYMENT")
  
-embedder = AzureOpenAIEmbeddings(
-    model=embedding_model_name,
-    api_key=embedding_api_key,
-    azure_deployment=embedding_deployment_name,
-    azure_endpoint=embedding_endpoint_url,
-    api_version="2024-10-21"
-)
+# The embedder, chat client and Chroma handle are opened once per process and reused by
+# every query (the clients share one keep-alive HTTP pool, see registry.py). The store is
+# rebuilt blue/green by temp_table; a newly published version is opened on the next query.
+store = VersionedStore(CHROMA_PATH)
+_served_version = None
+_reload_lock = threading.Lock()
+
+def _make_vectorstore():
+    global _served_version
+    from langchain.vectorstores.chroma import Chroma
+    _served_version = store.current_version()
+    return Chroma(persist_directory=store.current_path(), embedding_function=get_embeddings())
+
+def _make_retriever():
+    from retriever_service import RetrieverService
+    return RetrieverService(registry.get("RAG_pdf.vectorstore"), get_embeddings())
+
+registry.register("RAG_pdf.vectorstore", _make_vectorstore)
+registry.register("RAG_pdf.retriever", _make_retriever)
+
+__getattr__ = registry.lazy_module_attrs(__name__, {
+    "embedder": "azure_openai.embeddings",
+    "db": "RAG_pdf.vectorstore",
+    "retriever": "RAG_pdf.retriever",
+})
+
+def get_retriever():
+    """
+    Process-wide retriever service: open collection plus query-embedding LRU, reopened
+    on the live version when a rebuild has been published since it was opened.
+    """
+    if registry.is_created("RAG_pdf.vectorstore") and store.current_version() != _served_version:
+        with _reload_lock:
+            if store.current_version() != _served_version:
+                registry.reset("RAG_pdf.retriever")
+                registry.reset("RAG_pdf.vectorstore")
+    return registry.get("RAG_pdf.retriever")
  
-def query_rag(query_text):
-    db = Chroma(persist_directory=CHROMA_PATH, embedding_function=embedder)
-    results = db.similarity_search_with_relevance_scores(query_text, k=3)
+def query_rag(query_text, results=None):
+    if results is None:
+        results = get_retriever().search(query_text, k=3)
  
     if len(results) == 0 or results[0][1] < 0.7:
         return "Unable to find matching results.", ""
  
     context_text = "\n\n - -\n\n".join([doc.page_content for doc, _ in results])
  
-    client = AzureOpenAI(
-        azure_endpoint=endpoint_url,
-        azure_deployment=deployment_name,
-        api_key=api_key,
-        api_version=version_number
-    )
- 
-    rag_chat_completion = client.chat.completions.create(
+    rag_chat_completion = get_chat_client().chat.completions.create(
         model=model_name,
         messages=[
             {
@@ -65,8 +89,17 @@ If the answer is not found, say: 'I cannot answer that based on the context prov
     formatted_response = f"Response: {response_text}\nSources: {sources}\nUsage: {usage}"
     return formatted_response, response_text
  
+def query_rag_many(query_texts):
+    """Answer several queries; their retrieval is embedded and searched as one batch."""
+    return [
+        query_rag(query_text, results)
+        for query_text, results in zip(query_texts, get_retriever().query_many(query_texts, k=3))
+    ]
+ 
 # Test
-query_text = "What are the benefits of perksplus"
-formatted_response, response_text = query_rag(query_text)
-print(formatted_response)
+if __name__ == "__main__":
+    query_text = "What are the benefits of perksplus"
+    formatted_response, response_text = query_rag(query_text)
+    print(formatted_response)
+    print(f"Retriever: {get_retriever().stats()}")
  
\ No newline at end of file
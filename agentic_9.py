@@ -1,44 +1,28 @@
 # Import agnodata Agent and sample tools.
-from agno.agent import Agent
-# from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools 
-from agno.agent import Agent, RunResponse
-# from agno.knowledge.pdf_url import PDFUrlKnowledgeBase
-from agno.knowledge.text import TextKnowledgeBase
+# agno, langchain, openai, camelot and the scoring data are imported where they are
+# used; clients, the knowledge base and the agents are built on first use through the
+# registry, so importing this module has no network or disk side effects.
 from validation_agents import NameValidationAgent, ParentValidationAgent, ANNUAL_REPORT_KEYWORDS
-from agno.vectordb.chroma import ChromaDb
-from agno.embedder.azure_openai import AzureOpenAIEmbedder
-from agno.models.azure import AzureOpenAI as AOI
-from validation_agents import ParentValidationAgent, NameValidationAgent
-from agno.document.chunking.recursive import RecursiveChunking
 from pydantic import BaseModel, Field
-import requests
-from rule_decision import rule_function  # You must define this function
 import os
 from datetime import datetime
-import joblib
-import shutil
-import sklearn
-import numpy as np
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from agno.utils.pprint import pprint_run_response
-from openai import AzureOpenAI
 from temp_table import process_pdfs_in_directory
-from pathlib import Path
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-import pickle
+from pdf_stream import iter_pdf_pages
+from itertools import chain
 import json
-from langchain_community.vectorstores import Chroma
-from langchain_openai import AzureOpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from agno.knowledge.langchain import LangChainKnowledgeBase
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+import registry
+from registry import get_chat_client, get_embeddings, get_response_cache, make_agno_model
+from llm_cache import cached_completion
+from llm_stream import CompletionStream
+from feedback_regen import FeedbackHistory, affected_stages
 import warnings
 warnings.filterwarnings("ignore")
 
+if TYPE_CHECKING:
+    from agno.agent import RunResponse
+
 load_dotenv()  # Load env variables from .env file
 
 #GPT-4o
@@ -55,35 +39,22 @@ embedding_api_key = os.environ.get("ADA_AZURE_OPENAI_API_KEY")
 embedding_deployment_name = os.environ.get("ADA_AZURE_OPENAI_DEPLOYMENT")
 # version_number = os.environ.get("API_VERSION_GA")
 
-# Azure OpenAI
-client = AzureOpenAI(
-        azure_endpoint=endpoint_url,
-        azure_deployment=deployment_name,
-        api_key=api_key,
-        api_version=version_number,
-    )
+# Azure OpenAI chat client and (cached) embeddings are shared through the registry
+# and exposed here as the module attributes `client` and `embeddings`.
+
+def _make_knowledge_base():
+    from agno.knowledge.langchain import LangChainKnowledgeBase
+    print("Initialized empty knowledge base.")
+    return LangChainKnowledgeBase(retriever=None)  # No data loaded yet
+
+registry.register("agentic_9.knowledge_base", _make_knowledge_base)
 
-# Initialize embeddings (Azure OpenAI)
-embeddings = AzureOpenAIEmbeddings(
-  api_key = embedding_api_key,  
-  api_version = "2024-10-21",
-  azure_endpoint =embedding_endpoint_url
-)
-# Initialize an empty knowledge base globally
-
-# Function to set up the knowledge base
-# Function to set up the knowledge base
-# Declare the global knowledge_base variable with an initial value of None
-knowledge_base = None
 def setup_knowledge_base():
     """
     Set up the global knowledge base initially with None retriever.
     """
-    global knowledge_base
-    if knowledge_base is None:  # Initialize the knowledge base only once
-        knowledge_base = LangChainKnowledgeBase(retriever=None)  # No data loaded yet
-        print("Initialized empty knowledge base.")
-setup_knowledge_base()
+    return registry.get("agentic_9.knowledge_base")  # Initialized only once
+
 # Function to dynamically add documents to Chroma
 
 def validate_and_process_file(file_path, company_name):
@@ -92,19 +63,15 @@ def validate_and_process_file(file_path, company_name):
     Returns a tuple of (success: bool, message: str)
     """
     try:
-        # Load the PDF file
-        loader = PyPDFDirectoryLoader(
-            path=os.path.dirname(file_path),
-            glob=os.path.basename(file_path),
-            silent_errors=False
-        )
-        docs = loader.load()
+        # Stream the PDF page by page; keyword counting consumes each page once
+        pages = iter_pdf_pages(file_path)
+        first_page = next(pages, None)
         
-        if not docs:
+        if first_page is None:
             return False, "No content could be extracted from the PDF."
             
         # Extract document content
-        documents = [doc.page_content for doc in docs]
+        documents = (doc.page_content for doc in chain([first_page], pages))
         
         # Validate company name
         name_agent = NameValidationAgent()
@@ -124,10 +91,11 @@ def validate_and_process_file(file_path, company_name):
         validation_obj = json.loads(parent_validation_response)
         if validation_obj["response"] == "Yes":
             # File is valid, proceed with embedding
-            add_file_result = add_file_to_chroma(file_path)
+            add_file_result = add_file_to_chroma(file_path, company=name_validation_response)
             print("Processing tables from PDFs....")
             pdf_directory_path = "data/pdf_files"
             process_pdfs_in_directory(pdf_directory_path)
+            print(f"Document cache: {registry.get_document_cache().stats()}")
             return True, name_validation_response
         else:
             # File is not valid for the company
@@ -137,44 +105,116 @@ def validate_and_process_file(file_path, company_name):
         print(f"Error in validation process: {str(e)}")
         return False, f"Validation failed: {str(e)}"
 
-def add_file_to_chroma(file_path):
+def _open_report_store(company=None):
+    """
+    The Chroma collection for uploaded reports and the directory holding its manifest and
+    side indexes: the company's own partition, or the shared store when no company is given.
+    """
+    from langchain_community.vectorstores import Chroma
+    from company_namespace import NamespaceCatalog
+
+    if company is None:
+        return Chroma(embedding_function=get_embeddings(), persist_directory="chroma_db"), "chroma_db"
+    catalog = NamespaceCatalog("chroma_db")
+    db = Chroma(collection_name=catalog.collection_name(company), embedding_function=get_embeddings(), persist_directory="chroma_db")
+    return db, catalog.directory(company)
+
+def _make_report_retriever(db, store_dir, sparse_index, where=None, refresh=False):
+    """Hybrid dense + BM25 retriever over a report store (dense side from a local ANN index with VECTOR_INDEX=ann)."""
+    from hybrid_retriever import HybridRetriever
+
+    if os.getenv("VECTOR_INDEX", "chroma").lower() != "ann":
+        return HybridRetriever(vectorstore=db, sparse_index=sparse_index, where=where)
+    # Serve the dense side from a memory-mapped local index exported from Chroma
+    from ann_index import ANNIndex, DOCS_FILE
+    from chroma_adapter import chroma_collection
+    ann_dir = os.path.join(store_dir, "ann_index")
+    if refresh or not os.path.exists(os.path.join(ann_dir, DOCS_FILE)):
+        ANNIndex.from_chroma(chroma_collection(db, required=True), ann_dir, quantize=os.getenv("VECTOR_INDEX_QUANTIZE", "int8"))
+    return HybridRetriever(dense_index=ANNIndex.load(ann_dir), embeddings=get_embeddings(), sparse_index=sparse_index, where=where)
+
+def _sync_report_store(namespace=None, files=None, chunk_metadata=None):
+    """Embed new or changed PDFs into a report store (a company's partition, or the shared one)."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from ingest_manifest import sync_directory
+    from bm25_index import BM25Index, INDEX_FILE
+    from chunk_dedup import MinHashIndex, INDEX_FILE as DEDUP_INDEX_FILE
+
+    db, store_dir = _open_report_store(namespace)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+    # A BM25 keyword index is kept in step with the Chroma collection (same chunk IDs),
+    # and near-duplicate chunks (repeated boilerplate) are dropped before embedding
+    sparse_index = BM25Index.load(os.path.join(store_dir, INDEX_FILE))
+    dedup_index = MinHashIndex.load(
+        os.path.join(store_dir, DEDUP_INDEX_FILE),
+        threshold=float(os.getenv("CHUNK_DEDUP_THRESHOLD", "0.85")),
+    )
+    stats = sync_directory(
+        db, os.path.join("data", "pdf_files"), store_dir, text_splitter,
+        sparse_index=sparse_index, dedup_index=dedup_index, files=files, chunk_metadata=chunk_metadata,
+    )
+    print(f"Near-duplicate chunks: {dedup_index.stats()}")
+    return db, store_dir, sparse_index, stats
+
+def add_file_to_chroma(file_path, company=None):
     """
     Process the uploaded PDF file, extract embeddings, and update the retriever in the knowledge base.
+
+    With `company` (NameValidationAgent output or a company name) the file goes into that
+    company's namespace: its chunks are tagged with company, fiscal year and source, and
+    the knowledge base is scoped to that company's reports only.
     """
     try:
-        global knowledge_base
-       
-        # Load the PDF file 
-        loader = PyPDFDirectoryLoader(
-                path = "data\pdf_files",
-                glob = "**/[!.]*.pdf",
-                silent_errors = False,
-                load_hidden = False,
-                recursive = False,
-                extract_images = False
+        files, chunk_metadata, namespace = None, None, None
+        if company is not None:
+            from company_namespace import NamespaceCatalog, company_identity, detect_fiscal_year
+            catalog = NamespaceCatalog("chroma_db")
+            namespace = catalog.register_company(company_identity(company))
+            filename = os.path.basename(file_path)
+            previous = catalog.files.get(filename, {}).get("company")
+            opening_pages = [page["text"] for page in registry.get_document_cache().get(file_path).pages[:3]]
+            catalog.assign(filename, namespace, detect_fiscal_year(filename, opening_pages))
+            catalog.save()
+            if previous is not None and previous != namespace:
+                # Re-assigned to another company: drop it from the old partition
+                _sync_report_store(previous, catalog.files_for(previous), catalog.chunk_metadata)
+            files, chunk_metadata = catalog.files_for(namespace), catalog.chunk_metadata
+
+        # Embed only new or changed PDFs
+        db, store_dir, sparse_index, stats = _sync_report_store(namespace, files, chunk_metadata)
+ 
+        # Create a retriever fusing dense (Chroma) and keyword (BM25) results
+        retriever = _make_report_retriever(
+            db, store_dir, sparse_index, refresh=bool(stats.get("chunks_added") or stats.get("chunks_deleted")),
         )
-        docs = loader.load()
- 
-        # Split text into chunks for embedding
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        docs = text_splitter.split_documents(docs)
- 
-        # Initialize Chroma vector store and add documents
-        db = Chroma(embedding_function=embeddings, persist_directory="chroma_db")
-        db.add_documents(docs)
- 
-        # Create a retriever from the Chroma database
-        retriever = db.as_retriever()
  
         # Update the global knowledge base with the retriever
-        knowledge_base.retriever = retriever  # Associate the updated retriever
+        setup_knowledge_base().retriever = retriever  # Associate the updated retriever
        
-        print(f"Knowledge base updated with {len(docs)} documents.")  # Debugging log
+        print(f"Knowledge base updated ({namespace or 'all companies'}): {stats}")  # Debugging log
         return {"message": "Document processed and added to embeddings successfully!"}
  
     except Exception as e:
         print(f"Error in embedding process: {str(e)}")
         return {"error": f"Embedding failed: {str(e)}"}
+
+def scope_knowledge_base(company_name, fiscal_year=None):
+    """
+    Point the knowledge base at one company's reports (matched by name or alias),
+    optionally a single fiscal year ("FY2024"). Returns the namespace.
+    """
+    from bm25_index import BM25Index, INDEX_FILE
+    from company_namespace import NamespaceCatalog
+
+    namespace = NamespaceCatalog("chroma_db").resolve(company_name)
+    if namespace is None:
+        raise ValueError(f"No reports have been ingested for '{company_name}'.")
+    db, store_dir = _open_report_store(namespace)
+    sparse_index = BM25Index.load(os.path.join(store_dir, INDEX_FILE))
+    where = {"fiscal_year": fiscal_year} if fiscal_year else None
+    setup_knowledge_base().retriever = _make_report_retriever(db, store_dir, sparse_index, where=where)
+    return namespace
  
 # loader = PyPDFDirectoryLoader(
 #     path = "data\pdf_files",
@@ -271,46 +311,36 @@ def add_file_to_chroma(file_path):
 # ---------------------------------------------------------------------
 # Finance Agent: Uses multiple tools to generate a risk financial narrative.
 # ---------------------------------------------------------------------
-risk_analysis_finance_agent = Agent(
-    model=AOI(id=model_name,
-    api_key=api_key,
-    azure_endpoint=endpoint_url,
-    azure_deployment=deployment_name
-    ),
-    description="You are an agent that drafts a financial analysis draft for a corporate loan for a company. The context provided to you to will help you understand the company's financial figures, sentiment, news and stock market data if any",
-    tools=[YFinanceTools(key_financial_ratios = True, stock_fundamentals = True, company_news=True)], #add ml tool also
-    # run_id=run_id,
-    # user_id=user,
-    # knowledge=knowledge_base,
-    instructions="""Use the context to generate a financial analysis draft of the company.
+RISK_ANALYSIS_FINANCE_AGENT_INSTRUCTIONS = """Use the context to generate a financial analysis draft of the company.
 Provide a well-structured credit narrative that integrates all relevant information from the context.
 Include sections under the following headings:
 1. Financial and Stock Information
 2. Company News & Sentiment
 
-""",
-    # add_context_instructions = ""
-    # use_tools=True,
-    show_tool_calls=True,
-    debug_mode=True,
-    # markdown=True
-)
+"""
+
+def make_risk_analysis_finance_agent():
+    from agno.agent import Agent
+    from agno.tools.yfinance import YFinanceTools
+    return Agent(
+        model=make_agno_model(),
+        description="You are an agent that drafts a financial analysis draft for a corporate loan for a company. The context provided to you to will help you understand the company's financial figures, sentiment, news and stock market data if any",
+        tools=[YFinanceTools(key_financial_ratios = True, stock_fundamentals = True, company_news=True)], #add ml tool also
+        # run_id=run_id,
+        # user_id=user,
+        # knowledge=knowledge_base,
+        instructions=RISK_ANALYSIS_FINANCE_AGENT_INSTRUCTIONS,
+        # add_context_instructions = ""
+        # use_tools=True,
+        show_tool_calls=True,
+        debug_mode=True,
+        # markdown=True
+    )
 
 # ---------------------------------------------------------------------
 #  RAG Agent: Uses knowledge base to generate a risk financial narrative.
 # ---------------------------------------------------------------------
-risk_analysis_rag_agent = Agent(
-    model=AOI(id=model_name,
-    api_key=api_key,
-    azure_endpoint=endpoint_url,
-    azure_deployment=deployment_name
-    ),
-    description="You are an agent that comes up with draft for a corporate loan for a company based on the information in the knowledge base.",
-    # tools=[YFinanceTools(key_financial_ratios = True, stock_fundamentals = True, company_news=True)], #add ml tool also
-    # run_id=run_id,
-    # user_id=user,
-    knowledge=knowledge_base,
-    instructions="""You are tasked with generating an analysis. Query the knowledge base for:
+RISK_ANALYSIS_RAG_AGENT_INSTRUCTIONS = """You are tasked with generating an analysis. Query the knowledge base for:
  
 1. Positives - Financial strengths, strategic wins, liquidity improvements, favorable trends.
  
@@ -326,20 +356,41 @@ Output a well-structured credit narrative under the following headings:
 2. Risks
 3. Major Changes
 4. Financial Metrics and Ratios
-""",
-    # add_context_instructions = ""
-    # use_tools=True,
-    show_tool_calls=True,
-    debug_mode=True,
-    # markdown=True
-)
+"""
+
+def make_risk_analysis_rag_agent():
+    from agno.agent import Agent
+    return Agent(
+        model=make_agno_model(),
+        description="You are an agent that comes up with draft for a corporate loan for a company based on the information in the knowledge base.",
+        # tools=[YFinanceTools(key_financial_ratios = True, stock_fundamentals = True, company_news=True)], #add ml tool also
+        # run_id=run_id,
+        # user_id=user,
+        knowledge=setup_knowledge_base(),
+        instructions=RISK_ANALYSIS_RAG_AGENT_INSTRUCTIONS,
+        # add_context_instructions = ""
+        # use_tools=True,
+        show_tool_calls=True,
+        debug_mode=True,
+        # markdown=True
+    )
+
+def run_completion(messages, use_cache=True, stream=False, **params):
+    """
+    Chat completion through the shared client and response cache. Returns the reply
+    text, or with stream=True a CompletionStream yielding it as it arrives.
+    """
+    kwargs = dict(model=model_name, cache=get_response_cache(), deployment=deployment_name, use_cache=use_cache, **params)
+    if stream:
+        return CompletionStream(get_chat_client(), messages, **kwargs)
+    return cached_completion(get_chat_client(), messages, **kwargs)
 
 # ---------------------------------------------------------------------
 # Credit Narrative Agent: A simple agent that processes user feedback.
 # ---------------------------------------------------------------------
 class NarrativeAgent:
-    def process_narrative(self, credit_text: str) -> str:
-        narrative_chat_completion = client.chat.completions.create(
+    def process_narrative(self, credit_text: str, use_cache: bool = True, stream: bool = False):
+        return run_completion(
 
         messages=[
             {
@@ -358,11 +409,32 @@ Include sections under the following headings:
             }
         ],
 
-        model=model_name,
         # temperature=0.5,
+        use_cache=use_cache,
+        stream=stream,
         )
-        return narrative_chat_completion.choices[0].message.content
 
+
+    def revise_narrative(self, narrative: str, feedback: str, use_cache: bool = True, stream: bool = False):
+        """Apply reviewer feedback to an existing narrative in one call, without new research."""
+        return run_completion(
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are revising a credit narrative based on reviewer feedback. Apply every feedback point, keep the existing headings and all figures that the feedback does not ask to change, and do not introduce facts that are not in the narrative."""
+                },
+                {
+                    "role": "user",
+                    "content": f"""NARRATIVE:
+{narrative}
+
+FEEDBACK:
+{feedback}""",
+                }
+            ],
+            use_cache=use_cache,
+            stream=stream,
+        )
     
 narrative_agent = NarrativeAgent()
 
@@ -391,34 +463,22 @@ def evaluate_loan_risk(company_name: str, loan_value: float, collateral_value: f
     Evaluates loan risk based on company name, loan value, collateral value,
     and credit score in a single function (no nested implementation).
     """
+    import requests
+    from batch_scoring import score_application
+    from financials_store import get_store
+    from ticker_resolver import resolve_ticker
+
     print(f"Step 1: Evaluating loan risk for company '{company_name}'...")
  
     # -----------------------
     # Step 1: Search Ticker Symbol
     # -----------------------
     print(f"Looking up ticker symbol for '{company_name}'...")
-    url = f"https://query1.finance.yahoo.com/v1/finance/search?q={company_name}"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
-   
-    print(f"API Response Status Code: {response.status_code}")
-    if response.status_code != 200:
-        print(f"Error: Failed to fetch ticker data for {company_name}. Status Code: {response.status_code}")
-        return {"error": f"Failed to fetch ticker data for {company_name}. Status Code: {response.status_code}"}
-   
-    results = response.json().get("quotes", [])
-    print(f"Search Results: {results}")
-    ticker = None
-    for result in results:
-        symbol = result.get("symbol", "")
-        if symbol.endswith(".NS"):
-            ticker = symbol
-        elif symbol.endswith(".BO"):
-            ticker = symbol[:-3] + ".NS"
-        else:
-            ticker = symbol + ".NS"
-        if ticker:
-            break
+    try:
+        ticker = resolve_ticker(company_name)
+    except requests.RequestException as e:
+        print(f"Error: Failed to fetch ticker data for {company_name}. {e}")
+        return {"error": f"Failed to fetch ticker data for {company_name}. {e}"}
  
     if not ticker:
         print(f"Error: Could not find a valid ticker for {company_name}.")
@@ -431,21 +491,17 @@ def evaluate_loan_risk(company_name: str, loan_value: float, collateral_value: f
     # -----------------------
     print("Fetching financial data from 'Company_Financials_FY2024.xlsx'...")
     try:
-        df = pd.read_excel("Company_Financials_FY2024.xlsx")
+        row = get_store().get(ticker)
     except FileNotFoundError:
         print("Error: Financial Excel file not found.")
         return {"error": "Financial Excel file not found. Ensure 'Company_Financials_FY2024.xlsx' is present."}
- 
-    if "Company" not in df.columns:
+    except ValueError:
         print("Error: Excel file does not have a 'Company' column.")
         return {"error": "Excel file must have a 'Company' column."}
  
-    row = df[df['Company'] == ticker]
-    if row.empty:
+    if row is None:
         print(f"Error: Financial data for ticker {ticker} not found in the Excel sheet.")
         return {"error": f"Financial data for ticker {ticker} not found in the Excel sheet."}
-   
-    row = row.iloc[0]  # Select the first matching row
     print("Financial data fetched successfully.")
  
     data = {
@@ -469,59 +525,10 @@ def evaluate_loan_risk(company_name: str, loan_value: float, collateral_value: f
     # -----------------------
     print("Computing risk scores...")
     try:
-        df1 = pd.read_excel("Company_Financials_Synthetic_First100.xlsx")
+        final_score, ltc_ratio = score_application(data)
     except FileNotFoundError:
         print("Error: Synthetic financial data file not found.")
         return {"error": "Synthetic financial data file not found. Ensure 'Company_Financials_Synthetic_First100.xlsx' is present."}
- 
-    df2 = pd.DataFrame([data])
-    df = pd.concat([df1, df2], axis=0)
- 
-    # Keep only relevant columns
-    df = df[[
-        "Net Profit Margin %", "Return on Equity %", "Return on Assets %",
-        "Current Ratio", "Asset Turnover Ratio", "Debt Equity Ratio", "Debt To Asset Ratio",
-        "Interest Coverage Ratio", "Loan Value", "Collateral Value", "Credit Score",
-        "LtC"
-    ]]
-    print("Relevant columns selected.")
- 
-    # Drop unused columns and fill missing values
-    df = df.drop(columns=["Loan Value", "Collateral Value"])
-    df = df.fillna(df.median(numeric_only=True))
-    print("Data prepared and missing values handled.")
- 
-    # Scale the data using MinMaxScaler
-    scaler = MinMaxScaler()
-    scaled_data = scaler.fit_transform(df)
-    scaled_df = pd.DataFrame(scaled_data, columns=df.columns)
-    scaled_df = 1 + (100 * scaled_df)
-    print("Data scaled successfully.")
- 
-    # Apply weights to calculate scores
-    dict_fin_weights = {
-        "Net Profit Margin %": 0.25, "Return on Equity %": 0.25, "Return on Assets %": 0.25,
-        "Current Ratio": 0.25, "Asset Turnover Ratio": 0.1, "Debt Equity Ratio": 0.1, "Debt To Asset Ratio": -0.2
-    }
-    dict_repay_weights = {
-        "Interest Coverage Ratio": 0.20, "Credit Score": 0.65, "LtC": 0.15
-    }
- 
-    for col, weight in {**dict_fin_weights, **dict_repay_weights}.items():
-        scaled_df[col] = scaled_df[col] * weight
-    print("Weights applied to scaling.")
- 
-    scaled_df["Financial Risk Score"] = 100 - scaled_df[list(dict_fin_weights.keys())].sum(axis=1)
-    scaled_df["Repayment Risk Score"] = 100 - scaled_df[list(dict_repay_weights.keys())].sum(axis=1)
-    scaled_df["Final Risk Score"] = (
-        scaled_df["Financial Risk Score"] * 0.3 +
-        scaled_df["Repayment Risk Score"] * 0.7
-    )
-    print("Risk scores calculated.")
- 
-    # Extract the final risk score and Loan-to-Collateral Ratio for the new data row
-    final_score = scaled_df.iloc[-1]["Final Risk Score"]
-    ltc_ratio = df.iloc[-1]["LtC"]
     print(f"Final Risk Score: {final_score}, Loan-to-Collateral Ratio: {ltc_ratio}")
     return f"Final Risk Score: {final_score}, Loan-to-Collateral Ratio: {ltc_ratio}"
     # -----------------------
@@ -558,32 +565,18 @@ def evaluate_company(
 
     return evaluate_loan_risk(company_name, loan_value, collateral_value, credit_score)
 
-risk_score_agent = Agent(
-    model=AOI(id=model_name,
-    api_key=api_key,
-    azure_endpoint=endpoint_url,
-    azure_deployment=deployment_name
-    ),
-    # name="risk_score_agent",
-    description="You are an agent that calculates an application risk score based on the custom tool provided to you.",
-    instructions="You will recieve a company name, loan ammount, collateral value, credit score. You will use these values in the custom tool which when given these values will return an application risk score.",
-    tools=[evaluate_company],
-)
- 
-
-risk_calculation_narrative_agent = Agent(
-    model=AOI(id=model_name,
-    api_key=api_key,
-    azure_endpoint=endpoint_url,
-    azure_deployment=deployment_name
-    ),
-
-    description="You are an agent that calculates an application risk score.",
-    # tools=[evaluate_company_risk], #add ml tool also
-    # run_id=run_id,
-    # user_id=user,
-    # knowledge=knowledge_base,
-    instructions="""You will receive an application risk score from a rule-based model along with the loan amount and loan-to-collateral (LTC) ratio. You will also be provided with a credit risk narrative that outlines key financial information, company performance, and potential credit risks.
+def make_risk_score_agent():
+    from agno.agent import Agent
+    return Agent(
+        model=make_agno_model(),
+        # name="risk_score_agent",
+        description="You are an agent that calculates an application risk score based on the custom tool provided to you.",
+        instructions="You will recieve a company name, loan ammount, collateral value, credit score. You will use these values in the custom tool which when given these values will return an application risk score.",
+        tools=[evaluate_company],
+    )
+ 
+
+RISK_CALCULATION_NARRATIVE_AGENT_INSTRUCTIONS = """You will receive an application risk score from a rule-based model along with the loan amount and loan-to-collateral (LTC) ratio. You will also be provided with a credit risk narrative that outlines key financial information, company performance, and potential credit risks.
  
 Your task is to review the financial and long-term stock information in narrative, consider the LTC ratio, and adjust the rule-based model's score using a risk-based scale. The final risk score should range from 0 to 100, where 0 indicates no risk in approving a loan and 100 indicates the highest risk. Adjust the base score as follows:
  
@@ -604,23 +597,35 @@ Assign higher scores for higher LTC ratios and large loan amounts.
 Small loan amounts may reduce the risk impact even with high LTC ratios.
  
 Adjust the risk score smoothly and proportionally to reflect the strength of financial and long-term stock information in the narrative and financial context. Do not consider sentiment or short-term stock information in the evaluation. Return a single integer between 0 and 100 as the final adjusted risk score.
- """,
-    # add_context_instructions = ""
-    # use_tools=True,
-    show_tool_calls=True,
-    response_model=ScoreStructure,
-    # temperature=0.4
-    # debug_mode=True,
-    # markdown=True
-)
+ """
+
+def make_risk_calculation_narrative_agent():
+    from agno.agent import Agent
+    return Agent(
+        model=make_agno_model(),
+
+        description="You are an agent that calculates an application risk score.",
+        # tools=[evaluate_company_risk], #add ml tool also
+        # run_id=run_id,
+        # user_id=user,
+        # knowledge=knowledge_base,
+        instructions=RISK_CALCULATION_NARRATIVE_AGENT_INSTRUCTIONS,
+        # add_context_instructions = ""
+        # use_tools=True,
+        show_tool_calls=True,
+        response_model=ScoreStructure,
+        # temperature=0.4
+        # debug_mode=True,
+        # markdown=True
+    )
 
 # ---------------------------------------------------------------------
 # Feedback Agent: A simple agent that processes user feedback.
 # (It does not require any external tools.)
 # ---------------------------------------------------------------------
 class FeedbackAgent:
-    def process_feedback_narrative(self, feedback_text: str) -> str:
-        feedback_chat_completion = client.chat.completions.create(
+    def process_feedback_narrative(self, feedback_text: str, use_cache: bool = True) -> str:
+        return run_completion(
 
         messages=[
             {
@@ -634,13 +639,12 @@ class FeedbackAgent:
             }
         ],
 
-        model=model_name,
         # temperature=0.5,
+        use_cache=use_cache,
         )
-        return feedback_chat_completion.choices[0].message.content
 
-    def process_feedback_note(self, feedback_text: str) -> str:
-        feedback_chat_completion = client.chat.completions.create(
+    def process_feedback_note(self, feedback_text: str, use_cache: bool = True) -> str:
+        return run_completion(
 
         messages=[
             {
@@ -654,10 +658,9 @@ class FeedbackAgent:
             }
         ],
 
-        model=model_name,
         # temperature=0.5,
+        use_cache=use_cache,
         )
-        return feedback_chat_completion.choices[0].message.content
 
 feedback_agent = FeedbackAgent()
 
@@ -667,7 +670,7 @@ feedback_agent = FeedbackAgent()
 class CreditNoteAgent:
     def __init__(self, template: str):
         self.template = template
-    def generate_credit_note(self, narrative: str, user_query: str, loan_details: str, feedback_history: list = None) -> str:
+    def generate_credit_note(self, narrative: str, user_query: str, loan_details: str, feedback_history: list = None, use_cache: bool = True, stream: bool = False):
         """
         Generate a formal credit note based on the provided information.
        
@@ -676,9 +679,10 @@ class CreditNoteAgent:
             loan_amount (float): Loan amount in Cr.
             loan_purpose (str): Purpose of the loan.
             feedback_history (list, optional): List of past feedback. Defaults to None.
+            stream (bool, optional): Return a CompletionStream that yields the note as it is generated.
  
         Returns:
-            str: The generated credit note.
+            str: The generated credit note (a CompletionStream with stream=True).
         """
         current_date = datetime.now().strftime("%Y-%m-%d")
        
@@ -712,7 +716,7 @@ class CreditNoteAgent:
         """
  
         # Step 3: Send the request to the LLM
-        credit_note_chat_completion = client.chat.completions.create(
+        return run_completion(
             messages=[
                 {
                     "role": "system",
@@ -735,12 +739,12 @@ class CreditNoteAgent:
                     - LOAN DETAILS: {loan_details}"""
                 }
             ],
-            model=model_name,
             temperature=0.4,
+            use_cache=use_cache,
+            stream=stream,
         )
  
         # Step 4: Return the generated credit note
-        return credit_note_chat_completion.choices[0].message.content
  
 #Adjust the template format as required.
 credit_note_template = """
@@ -790,32 +794,90 @@ Date: {{date_2}}
 Signature: _____________________________
 """
 credit_note_agent = CreditNoteAgent(credit_note_template)
+
+# Agno agents are built on first use; `from agentic_9 import risk_score_agent` still works
+registry.register("agentic_9.risk_analysis_finance_agent", make_risk_analysis_finance_agent)
+registry.register("agentic_9.risk_analysis_rag_agent", make_risk_analysis_rag_agent)
+registry.register("agentic_9.risk_score_agent", make_risk_score_agent)
+registry.register("agentic_9.risk_calculation_narrative_agent", make_risk_calculation_narrative_agent)
+
+__getattr__ = registry.lazy_module_attrs(__name__, {
+    "client": "azure_openai.chat_client",
+    "embeddings": "azure_openai.embeddings",
+    "knowledge_base": "agentic_9.knowledge_base",
+    "risk_analysis_finance_agent": "agentic_9.risk_analysis_finance_agent",
+    "risk_analysis_rag_agent": "agentic_9.risk_analysis_rag_agent",
+    "risk_score_agent": "agentic_9.risk_score_agent",
+    "risk_calculation_narrative_agent": "agentic_9.risk_calculation_narrative_agent",
+})
  
  
+# ---------------------------------------------------------------------
+# Narrative DAG: finance and RAG agents are independent, so they run concurrently and
+# only join at the narrative agent (latency is max(finance, RAG), not the sum).
+# ---------------------------------------------------------------------
+def make_narrative_pipeline(max_workers=None):
+    from pipeline_dag import PipelineDAG, Stage
+    finance_agent = registry.get("agentic_9.risk_analysis_finance_agent")
+    rag_agent = registry.get("agentic_9.risk_analysis_rag_agent")
+
+    def finance(input_data):
+        return finance_agent.run(input_data)
+
+    def rag(input_data):
+        return rag_agent.run(input_data)
+
+    def narrative(finance, rag, narrative_context=""):
+        return narrative_agent.process_narrative(narrative_context + finance.content + "\n\n" + rag.content)
+
+    return PipelineDAG([
+        Stage("finance", finance),
+        Stage("rag", rag),
+        Stage("narrative", narrative, deps=["finance", "rag"]),
+    ], max_workers=max_workers)
+
+def print_stream(stream):
+    """Print a CompletionStream as it arrives and return the full text."""
+    for chunk in stream:
+        print(chunk, end="", flush=True)
+    print(f"\n(time to first token: {stream.time_to_first_token or 0:.2f}s, total: {stream.total_seconds or 0:.2f}s)")
+    return stream.text
+
 # ---------------------------------------------------------------------
 # Main pipeline: Combines all the agents and human-in-the-loop interactions.
 # ---------------------------------------------------------------------
 def main():
+    from agno.utils.pprint import pprint_run_response
+    narrative_pipeline = make_narrative_pipeline()
+    feedback_history = FeedbackHistory()
+    risk_calculation_narrative_agent = registry.get("agentic_9.risk_calculation_narrative_agent")
+
     input_data = "Generate me a credit note for a corporate loan for Microsoft"
     # Step 1: Generate and approve risk narrative
     # while True:  
-    print("Finance Agent")
-    finance_narrative_response: RunResponse = risk_analysis_finance_agent.run(input_data)
+    # Finance and RAG agents run concurrently and join at the narrative stage
+    print("Finance Agent + RAG Agent")
+    stages = narrative_pipeline.run({"input_data": input_data})
+    finance_narrative_response: RunResponse = stages["finance"]
+    rag_agent_response: RunResponse = stages["rag"]
     pprint_run_response(finance_narrative_response, markdown=True, show_time=True)
-    print("RAG Agent")
-    rag_agent_response: RunResponse = risk_analysis_rag_agent.run(input_data)
     pprint_run_response(rag_agent_response, markdown=True, show_time=True)
 
     print("\n--- Generating Risk Narrative ---")
-    narrative_response = narrative_agent.process_narrative(finance_narrative_response.content + "\n\n" + rag_agent_response.content)
+    narrative_response = stages["narrative"]
     print(narrative_response)
+    print(f"Stage timings: {narrative_pipeline.format_timings()}")
     company = input("Enter company name: ").strip()
     loan = float(input("Enter loan value: "))
     collateral = float(input("Enter collateral value: "))
     credit = int(input("Enter credit score (300-900): "))
     risk_score,ltc = evaluate_company_risk(company, loan, collateral, credit)
     print(risk_score)
-    score_response: RunResponse = risk_calculation_narrative_agent.run("rule based model score:" + str(risk_score) + "\n\n"+ "Loan Amount:" + str(loan) + "\n\n" + "Loan to Collateral Ratio:" + str(ltc) + "\n\n" + narrative_response)
+
+    def score_prompt(narrative):
+        return "rule based model score:" + str(risk_score) + "\n\n"+ "Loan Amount:" + str(loan) + "\n\n" + "Loan to Collateral Ratio:" + str(ltc) + "\n\n" + narrative
+
+    score_response: RunResponse = risk_calculation_narrative_agent.run(score_prompt(narrative_response))
     pprint_run_response(score_response, markdown=True, show_time=True)
     print("----------",score_response)
     while True:  # Approval inner loop
@@ -825,22 +887,35 @@ def main():
             final_narrative_response = narrative_response  # Store final response
             break  # Exit inner loop
 
-        # Feeback if user isn't happy
+        # Feeback if user isn't happy: only the stages the feedback touches are re-run,
+        # earlier outputs are reused and the feedback history is kept to a bounded summary
         user_feedback_narrative = input("Enter your feedback to improve the narrative: ")
-        structured_fb_narrative = feedback_agent.process_feedback_narrative(user_feedback_narrative)
-        input_data = input_data + " " + structured_fb_narrative 
-        print("Feedback received. Regenerating narrative...\n")
-
-        finance_narrative_response: RunResponse = risk_analysis_finance_agent.run(input_data)
-        pprint_run_response(narrative_response, markdown=True, show_time=True)
-        rag_agent_response: RunResponse = risk_analysis_rag_agent.run(input_data)
-        pprint_run_response(rag_agent_response, markdown=True, show_time=True)
-
-        print("\n--- Generating Risk Narrative ---")
-        narrative_response = narrative_agent.process_narrative(input_data + "\n\n" + finance_narrative_response.content + "\n\n" + rag_agent_response.content)
-        print(narrative_response)
+        feedback_history.add(user_feedback_narrative)
+        rerun = affected_stages(user_feedback_narrative)
+        print(f"Feedback received. Regenerating: {', '.join(sorted(rerun))}\n")
+
+        if rerun & {"finance", "rag"}:
+            structured_fb_narrative = feedback_agent.process_feedback_narrative(feedback_history.summary())
+            reuse = {name: stages[name] for name in ("finance", "rag") if name not in rerun}
+            stages = narrative_pipeline.run({
+                **reuse,
+                "input_data": input_data + " " + structured_fb_narrative,
+                "narrative_context": "FEEDBACK:\n" + feedback_history.summary() + "\n\n",
+            })
+            for name in ("finance", "rag"):
+                if name in rerun:
+                    pprint_run_response(stages[name], markdown=True, show_time=True)
+            print("\n--- Generating Risk Narrative ---")
+            narrative_response = stages["narrative"]
+            print(narrative_response)
+            print(f"Stage timings: {narrative_pipeline.format_timings()}")
+        else:
+            # Narrative-only edit: a single call revising the previous narrative, streamed
+            print("\n--- Generating Risk Narrative ---")
+            narrative_response = print_stream(narrative_agent.revise_narrative(narrative_response, feedback_history.summary(), stream=True))
 
-        score_response: RunResponse = risk_calculation_narrative_agent.run(narrative_response)
+        # The score describes the narrative, so it is regenerated whenever the narrative is
+        score_response: RunResponse = risk_calculation_narrative_agent.run(score_prompt(narrative_response))
         pprint_run_response(score_response, markdown=True, show_time=True)
         # print(score_response)
 
@@ -850,9 +925,8 @@ def main():
     # Step 2: Generate and approve credit note
     # while True:  
     print("\n--- Generating Credit Note ---")
-    credit_note = credit_note_agent.generate_credit_note(final_narrative_response, input_data)
     print("\nGenerated Credit Note:")
-    print(credit_note)
+    credit_note = print_stream(credit_note_agent.generate_credit_note(final_narrative_response, input_data, str(loan), stream=True))
 
     while True:  # Approval loop for credit note
         approval_cn = input("Do you approve the credit note? (yes/no): ").strip().lower()
@@ -867,13 +941,14 @@ def main():
         input_data = input_data + " " + structured_fb_credit  # Update input with feedback
         # print(input_data)
 
-        credit_note = credit_note_agent.generate_credit_note(final_narrative_response, input_data)
         # print("regen-note")
-        print(credit_note)
+        credit_note = print_stream(credit_note_agent.generate_credit_note(final_narrative_response, input_data, str(loan), stream=True))
 
         # break  #Exit outer loop after approval
 
     print("\nProcess Complete: Final narrative and credit note have been approved.")
+    print(f"LLM response cache: {get_response_cache().stats()}")
+    print(f"Azure OpenAI connections: {registry.get_connection_stats()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+IVF_FILE = "ivf.npz"
+DOCS_FILE = "docs.json"
+
+# Below this many vectors a flat (exact) scan is as fast as probing lists
+FLAT_THRESHOLD = 2048
+
+# Default share of true top-10 neighbours nprobe is calibrated to find, and the floor on
+# nprobe as a share of nlist
+RECALL_TARGET = 0.95
+MIN_PROBE_SHARE = 1 / 8
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample; returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), nlist * 64), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = sample[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def _calibrate_nprobe(vectors: np.ndarray, centroids: np.ndarray, assign: np.ndarray, recall_target: float,
+                      queries: int = 64, k: int = 10, seed: int = 0) -> int:
+    """
+    Smallest nprobe whose recall@k against an exact scan reaches `recall_target`, using
+    sampled stored vectors as queries (their own row excluded), and at least
+    MIN_PROBE_SHARE of the clusters.
+    """
+    nlist = len(centroids)
+    floor = max(1, int(np.ceil(nlist * MIN_PROBE_SHARE)))
+    k = min(k, len(vectors) - 1)
+    if k < 1:
+        return floor
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(vectors), size=min(len(vectors), queries), replace=False)
+    ranks = []
+    for row in sample:
+        query = vectors[row]
+        scores = vectors @ query
+        scores[row] = -np.inf
+        neighbours = np.argpartition(-scores, k)[:k]
+        # Position of each true neighbour's cluster in the query's probe order
+        cluster_rank = np.empty(nlist, dtype=np.int64)
+        cluster_rank[np.argsort(-(centroids @ query))] = np.arange(nlist)
+        ranks.append(cluster_rank[assign[neighbours]])
+    ranks = np.sort(np.concatenate(ranks))
+    # nprobe must cover the cluster rank of recall_target of all true neighbours
+    needed = int(ranks[min(len(ranks) - 1, int(np.ceil(recall_target * len(ranks))) - 1)]) + 1
+    return min(nlist, max(floor, needed))
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block: int = 16384) -> np.ndarray:
+    return np.concatenate([
+        np.argmax(vectors[i:i + block] @ centroids.T, axis=1) for i in range(0, len(vectors), block)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+
+class ANNIndex:
+    """
+    Embedded approximate-nearest-neighbour index (cosine) on a memory-mapped file.
+
+    Vectors are stored unit-normalized as float32, or int8 with a per-vector scale (a
+    quarter of the size), in a .npy file opened with mmap so loading takes milliseconds
+    and only the pages a query touches are read. Above FLAT_THRESHOLD vectors an IVF
+    structure is built: rows are clustered by spherical k-means and stored contiguously
+    per cluster, and a query scans only the `nprobe` closest clusters. Smaller indexes
+    are scanned exactly.
+
+    nprobe trades recall for latency: query time grows roughly linearly with the share of
+    clusters probed, and recall with it. By default build() calibrates it against an exact
+    scan of sampled stored vectors to the smallest value reaching `recall_target` recall@10
+    (never below nlist/8) and stores it with the index. Well-clustered data such as text
+    embeddings needs few probes; data with no cluster structure may need most of them,
+    approaching a flat scan.
+
+    Metadata filters (`where={"source": ..., "company": ..., "page": ...}`) are exact
+    matches on chunk metadata and are applied before ranking.
+    """
+
+    def __init__(self, directory: str, vectors, scales, centroids, offsets, ids, texts, metadatas, nprobe: int = 1):
+        self.directory = directory
+        self.vectors = vectors
+        self.scales = scales
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.nprobe = nprobe
+        self._filters: Dict[tuple, np.ndarray] = {}
+        self._row_of: Optional[Dict[str, int]] = None
+
+    # -----------------------------
+    # Build / load
+    # -----------------------------
+    @classmethod
+    def build(
+        cls,
+        directory: str,
+        ids: Sequence[str],
+        vectors,
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[dict]] = None,
+        quantize: str = "int8",
+        nlist: Optional[int] = None,
+        recall_target: float = RECALL_TARGET,
+    ) -> "ANNIndex":
+        """
+        Write an index for the given vectors to `directory` (replacing any existing one)
+        and return it opened.
+
+        Args:
+          quantize: "int8" (default) or "float32".
+          nlist: IVF clusters; defaults to ~2*sqrt(N), or a flat index for small N.
+          recall_target: recall@10 the stored default nprobe is calibrated to.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not vectors.size:
+            # No vectors (e.g. a new, empty collection): an empty index that finds nothing
+            vectors = vectors.reshape(0, vectors.shape[1] if vectors.ndim == 2 else 0)
+        vectors = _normalize(vectors)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in ids]
+        n = len(vectors)
+        if nlist is None:
+            nlist = 1 if n < FLAT_THRESHOLD else int(2 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        if nlist > 1:
+            centroids = _kmeans(vectors, nlist)
+            assign = _assign(vectors, centroids)
+            nprobe = _calibrate_nprobe(vectors, centroids, assign, recall_target)
+        else:
+            centroids = np.zeros((1, vectors.shape[1]), dtype=np.float32)
+            assign = np.zeros(n, dtype=np.int64)
+            nprobe = 1
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))]).astype(np.int64)
+
+        os.makedirs(directory, exist_ok=True)
+
+        def tmp(name):
+            return os.path.join(directory, name + ".tmp")
+
+        ordered = vectors[order]
+        if quantize == "int8":
+            scales = np.abs(ordered).max(axis=1) / 127.0 if n else np.zeros(0, dtype=np.float32)
+            scales = np.where(scales == 0, 1, scales).astype(np.float32)
+            stored = np.round(ordered / scales[:, None]).astype(np.int8)
+            with open(tmp(SCALES_FILE), "wb") as f:
+                np.save(f, scales)
+        elif quantize == "float32":
+            stored = ordered
+        else:
+            raise ValueError(f"Unknown quantization '{quantize}'; use 'int8' or 'float32'.")
+        with open(tmp(VECTORS_FILE), "wb") as f:
+            np.save(f, stored)
+        with open(tmp(IVF_FILE), "wb") as f:
+            np.savez(f, centroids=centroids, offsets=offsets, nprobe=nprobe)
+        with open(tmp(DOCS_FILE), "w") as f:
+            json.dump({
+                "quantize": quantize,
+                "ids": [ids[i] for i in order],
+                "texts": [texts[i] for i in order],
+                "metadatas": [metadatas[i] or {} for i in order],
+            }, f)
+
+        for name in (VECTORS_FILE, IVF_FILE, DOCS_FILE) + ((SCALES_FILE,) if quantize == "int8" else ()):
+            os.replace(tmp(name), os.path.join(directory, name))
+        if quantize == "float32" and os.path.exists(os.path.join(directory, SCALES_FILE)):
+            os.remove(os.path.join(directory, SCALES_FILE))
+        return cls.load(directory)
+
+    @classmethod
+    def load(cls, directory: str, nprobe: Optional[int] = None) -> "ANNIndex":
+        """Open an index; `nprobe` overrides the one calibrated at build time."""
+        with open(os.path.join(directory, DOCS_FILE)) as f:
+            docs = json.load(f)
+        ivf = np.load(os.path.join(directory, IVF_FILE))
+        if nprobe is None:
+            nlist = len(ivf["offsets"]) - 1
+            nprobe = int(ivf["nprobe"]) if "nprobe" in ivf else max(1, int(np.ceil(nlist * MIN_PROBE_SHARE)))
+        scales = None
+        if docs["quantize"] == "int8":
+            scales = np.load(os.path.join(directory, SCALES_FILE), mmap_mode="r")
+        return cls(
+            directory,
+            np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r"),
+            scales,
+            ivf["centroids"],
+            ivf["offsets"],
+            docs["ids"],
+            docs["texts"],
+            docs["metadatas"],
+            nprobe=nprobe,
+        )
+
+    @classmethod
+    def from_chroma(cls, collection, directory: str, quantize: str = "int8", batch_size: int = 5000) -> "ANNIndex":
+        """Build from the vectors already stored in a chromadb collection (nothing is re-embedded)."""
+        ids, vectors, texts, metadatas = [], [], [], []
+        for offset in range(0, collection.count(), batch_size):
+            got = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+            ids += got["ids"]
+            vectors += list(got["embeddings"])
+            texts += got["documents"]
+            metadatas += [m or {} for m in got["metadatas"]]
+        return cls.build(directory, ids, np.asarray(vectors, dtype=np.float32), texts, metadatas, quantize=quantize)
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _allowed(self, where: dict) -> np.ndarray:
+        key = tuple(sorted(where.items()))
+        if key not in self._filters:
+            self._filters[key] = np.fromiter(
+                (all(m.get(k) == v for k, v in where.items()) for m in self.metadatas),
+                dtype=bool, count=len(self.metadatas),
+            )
+        return self._filters[key]
+
+    def _score_rows(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        scores = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales[rows]
+        return scores
+
+    def search(self, query_vector, k: int = 4, where: Optional[dict] = None, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity), best first."""
+        if not len(self.ids):
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+        allowed = self._allowed(where) if where else None
+        nlist = len(self.offsets) - 1
+        probes = np.argsort(-(self.centroids @ query)) if nlist > 1 else np.zeros(1, dtype=np.int64)
+        nprobe = min(nprobe or self.nprobe, nlist)
+
+        while True:
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in probes[:nprobe]])
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            # With a selective filter, widen the probe until k matches are found
+            if len(rows) >= k or nprobe >= nlist:
+                break
+            nprobe = min(nprobe * 2, nlist)
+
+        if not len(rows):
+            return []
+        scores = self._score_rows(rows, query)
+        top = np.argsort(-scores)[:k]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def document(self, doc_id: str) -> Document:
+        if self._row_of is None:
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        row = self._row_of[doc_id]
+        return Document(page_content=self.texts[row], metadata=self.metadatas[row])
+
+    def as_retriever(self, embeddings, k: int = 4, where: Optional[dict] = None) -> "ANNRetriever":
+        return ANNRetriever(index=self, embeddings=embeddings, k=k, where=where)
+
+
+class ANNRetriever(BaseRetriever):
+    """LangChain retriever over an ANNIndex (usable by LangChainKnowledgeBase unchanged)."""
+
+    index: Any
+    embeddings: Any
+    k: int = 4
+    where: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        hits = self.index.search(self.embeddings.embed_query(query), k=self.k, where=self.where)
+        return [self.index.document(doc_id) for doc_id, _ in hits]
+
+
+if __name__ == "__main__":
+    # Export a Chroma store to a local index: python ann_index.py <chroma dir> <collection> <out dir> [int8|float32]
+    import chromadb
+
+    chroma_dir, collection_name, out_dir = sys.argv[1:4]
+    started = time.perf_counter()
+    index = ANNIndex.from_chroma(
+        chromadb.PersistentClient(path=chroma_dir).get_collection(collection_name),
+        out_dir,
+        quantize=sys.argv[4] if len(sys.argv) > 4 else "int8",
+    )
+    print(f"Built index of {len(index)} vectors in {out_dir} ({time.perf_counter() - started:.1f}s)")
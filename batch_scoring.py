@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Union
+
+# -----------------------------
+# Scoring configuration
+# -----------------------------
+BASELINE_PATH = "Company_Financials_Synthetic_First100.xlsx"
+
+# Raw application columns, in the order expected for NumPy input
+RAW_COLUMNS = [
+    "Net Profit Margin %", "Return on Equity %", "Return on Assets %",
+    "Current Ratio", "Asset Turnover Ratio", "Debt Equity Ratio", "Debt To Asset Ratio",
+    "Interest Coverage Ratio", "Loan Value", "Collateral Value", "Credit Score"
+]
+
+# Columns that are scaled and weighted (Loan/Collateral Value collapse into LtC)
+FEATURE_COLUMNS = [
+    "Net Profit Margin %", "Return on Equity %", "Return on Assets %",
+    "Current Ratio", "Asset Turnover Ratio", "Debt Equity Ratio", "Debt To Asset Ratio",
+    "Interest Coverage Ratio", "Credit Score", "LtC"
+]
+
+dict_fin_weights = {
+    "Net Profit Margin %": 0.25, "Return on Equity %": 0.25, "Return on Assets %": 0.25,
+    "Current Ratio": 0.25, "Asset Turnover Ratio": 0.1, "Debt Equity Ratio": 0.1, "Debt To Asset Ratio": -0.2
+}
+dict_repay_weights = {
+    "Interest Coverage Ratio": 0.20, "Credit Score": 0.65, "LtC": 0.15
+}
+
+
+# -----------------------------
+# Helper Functions
+# -----------------------------
+def _to_frame(applications: Union[pd.DataFrame, np.ndarray, Dict, list]) -> pd.DataFrame:
+    """Coerce dicts, lists of dicts or a NumPy array (RAW_COLUMNS order) into a DataFrame."""
+    if isinstance(applications, pd.DataFrame):
+        return applications
+    if isinstance(applications, dict):
+        return pd.DataFrame([applications])
+    if isinstance(applications, np.ndarray):
+        return pd.DataFrame(np.atleast_2d(applications), columns=RAW_COLUMNS)
+    return pd.DataFrame(list(applications))
+
+
+def prepare_features(applications: Union[pd.DataFrame, np.ndarray, Dict, list]) -> np.ndarray:
+    """
+    Build the (N, len(FEATURE_COLUMNS)) float matrix used for scoring.
+
+    LtC is derived from Loan Value / Collateral Value when both are present; a zero
+    collateral value yields NaN (same as safe_div returning None).
+    """
+    df = _to_frame(applications)
+    features = np.full((len(df), len(FEATURE_COLUMNS)), np.nan, dtype=np.float64)
+    for j, col in enumerate(FEATURE_COLUMNS[:-1]):
+        if col in df.columns:
+            features[:, j] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+
+    if "Loan Value" in df.columns and "Collateral Value" in df.columns:
+        loan = pd.to_numeric(df["Loan Value"], errors="coerce").to_numpy(dtype=np.float64)
+        collateral = pd.to_numeric(df["Collateral Value"], errors="coerce").to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ltc = np.where(collateral == 0, np.nan, loan / collateral)
+    elif "LtC" in df.columns:
+        ltc = pd.to_numeric(df["LtC"], errors="coerce").to_numpy(dtype=np.float64)
+    else:
+        ltc = np.full(len(df), np.nan)
+    features[:, -1] = ltc
+    return features
+
+
+class ReferenceStats:
+    """
+    Per-column min, max and median of the baseline population, in FEATURE_COLUMNS order,
+    plus the weights applied when scoring against it.
+    """
+
+    def __init__(self, ref_min: np.ndarray, ref_max: np.ndarray, ref_median: np.ndarray):
+        self.ref_min = np.asarray(ref_min, dtype=np.float64)
+        self.ref_max = np.asarray(ref_max, dtype=np.float64)
+        self.ref_median = np.asarray(ref_median, dtype=np.float64)
+        self.fin_weights = dict(dict_fin_weights)
+        self.repay_weights = dict(dict_repay_weights)
+        self.profile_hash = None
+
+    @classmethod
+    def from_frame(cls, baseline: pd.DataFrame) -> "ReferenceStats":
+        features = prepare_features(baseline)
+        return cls(
+            np.nanmin(features, axis=0),
+            np.nanmax(features, axis=0),
+            np.nanmedian(features, axis=0),
+        )
+
+
+_reference_cache: Dict[str, ReferenceStats] = {}
+
+
+def load_reference(path: str = BASELINE_PATH) -> ReferenceStats:
+    """
+    Return the reference statistics for a baseline workbook, held in memory for the life
+    of the process. The default baseline is served from the compiled scoring profile.
+    """
+    if path not in _reference_cache:
+        if path == BASELINE_PATH:
+            from scoring_profile import load_profile
+            _reference_cache[path] = load_profile(path)
+        else:
+            _reference_cache[path] = ReferenceStats.from_frame(pd.read_excel(path))
+    return _reference_cache[path]
+
+
+# -----------------------------
+# Vectorized scoring
+# -----------------------------
+def score_applications(
+    applications: Union[pd.DataFrame, np.ndarray, Dict, list],
+    reference: Optional[ReferenceStats] = None,
+) -> pd.DataFrame:
+    """
+    Score N loan applications in one vectorized pass.
+
+    Each row is scored exactly as if it had been appended alone to the baseline and
+    run through MinMaxScaler: missing values take the baseline median, and the row's
+    own values widen the baseline min/max when they fall outside it.
+
+    Args:
+      applications: DataFrame / list of dicts with RAW_COLUMNS (or LtC), or a NumPy
+        array laid out in RAW_COLUMNS order.
+      reference: Baseline statistics; defaults to load_reference().
+
+    Returns:
+      pd.DataFrame: Financial, Repayment and Final Risk Score plus the filled LtC per row.
+    """
+    if reference is None:
+        reference = load_reference()
+
+    features = prepare_features(applications)
+    features = np.where(np.isnan(features), reference.ref_median, features)
+
+    col_min = np.fmin(reference.ref_min, features)
+    col_max = np.fmax(reference.ref_max, features)
+    data_range = col_max - col_min
+    # MinMaxScaler treats a zero range as a scale of 1
+    data_range = np.where(data_range == 0, 1.0, data_range)
+    scaled = 1 + 100 * ((features - col_min) / data_range)
+
+    fin_idx = [FEATURE_COLUMNS.index(col) for col in reference.fin_weights]
+    repay_idx = [FEATURE_COLUMNS.index(col) for col in reference.repay_weights]
+    fin_w = np.fromiter(reference.fin_weights.values(), dtype=np.float64)
+    repay_w = np.fromiter(reference.repay_weights.values(), dtype=np.float64)
+
+    financial = 100 - scaled[:, fin_idx] @ fin_w
+    repayment = 100 - scaled[:, repay_idx] @ repay_w
+    final = financial * 0.3 + repayment * 0.7
+
+    index = applications.index if isinstance(applications, pd.DataFrame) else None
+    return pd.DataFrame({
+        "Financial Risk Score": financial,
+        "Repayment Risk Score": repayment,
+        "Final Risk Score": final,
+        "LtC": features[:, -1],
+    }, index=index)
+
+
+def score_application(data: Dict, reference: Optional[ReferenceStats] = None):
+    """Score a single application dict. Returns (final_risk_score, ltc) like rule_function."""
+    row = score_applications(data, reference).iloc[0]
+    return float(row["Final Risk Score"]), float(row["LtC"])
+
+
+# -----------------------------
+# Main Execution
+# -----------------------------
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python batch_scoring.py applications.xlsx [scored.csv]
+    input_path = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else "scored_applications.csv"
+    applications = pd.read_csv(input_path) if input_path.endswith(".csv") else pd.read_excel(input_path)
+    scores = score_applications(applications)
+    pd.concat([applications, scores.drop(columns=["LtC"])], axis=1).to_csv(output_path, index=False)
+    print(f"Scored {len(scores)} applications -> {output_path}")
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Modules a server worker or CLI run imports at startup
+DEFAULT_MODULES = ["validation_agents", "temp_table", "agentic_9"]
+
+# Run in a fresh interpreter so nothing is already cached in sys.modules
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("agno", "langchain", "langchain_openai", "openai", "camelot", "IPython", "pandas", "pypdf") if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def time_import(module: str, repeat: int = 3) -> dict:
+    """
+    Cold-import a module `repeat` times, each in a new interpreter.
+
+    Returns:
+      dict: Best time in seconds and the heavy packages the import pulled in.
+    """
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "frozen_modules=off", "-c", _PROBE.format(module=module)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or probe["seconds"] < best["seconds"]:
+            best = probe
+    return {"module": module, **best}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time benchmark guarding cold start.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds allowed per module import.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        result = time_import(module, args.repeat)
+        if "error" in result:
+            print(f"{module:<20} FAILED  {result['error']}")
+            failed = True
+            continue
+        over = result["seconds"] > args.budget
+        failed = failed or over
+        heavy = ", ".join(result["heavy"]) or "-"
+        print(f"{module:<20} {result['seconds'] * 1000:8.1f} ms  {'OVER BUDGET' if over else 'ok':<11}  heavy imports: {heavy}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import os
+import re
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INDEX_FILE = "bm25_index.json"
+
+# Words, numbers with decimals (3.5, 12.75) and alphanumerics like fy2024 or q3
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Sparse keyword index (Okapi BM25) over the same chunks as a vector store, keyed by
+    the same chunk IDs so results can be fused with dense retrieval.
+
+    Documents are added and deleted by ID as the corpus changes; only per-document term
+    counts are stored and the inverted index is rebuilt from them on load. Persisted as
+    JSON next to the vector store.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, Dict] = {}  # id -> {"text", "metadata", "tf", "len"}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_len = 0
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "BM25Index":
+        index = cls(path, **kwargs)
+        if os.path.exists(path):
+            with open(path) as f:
+                for doc_id, doc in json.load(f)["docs"].items():
+                    index._insert(doc_id, doc)
+        return index
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "docs": self.docs}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.docs
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _insert(self, doc_id: str, doc: Dict):
+        self.docs[doc_id] = doc
+        self._total_len += doc["len"]
+        for term, count in doc["tf"].items():
+            self._postings[term][doc_id] = count
+
+    def add(self, ids: Iterable[str], texts: Iterable[str], metadatas: Optional[Iterable[dict]] = None):
+        """Index (or re-index) documents under the given IDs."""
+        ids, texts = list(ids), list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(ids)
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            if doc_id in self.docs:
+                self.delete([doc_id])
+            tokens = tokenize(text)
+            self._insert(doc_id, {"text": text, "metadata": metadata or {}, "tf": dict(Counter(tokens)), "len": len(tokens)})
+            self.dirty = True
+
+    def delete(self, ids: Iterable[str]):
+        for doc_id in ids:
+            doc = self.docs.pop(doc_id, None)
+            if doc is None:
+                continue
+            self._total_len -= doc["len"]
+            for term in doc["tf"]:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self.dirty = True
+
+    def search(self, query: str, k: int = 20, where: Optional[dict] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (id, BM25 score) for a query, best first. `where` keeps only documents
+        whose metadata has all the given key/value pairs.
+        """
+        n = len(self.docs)
+        if not n:
+            return []
+        avg_len = self._total_len / n or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.docs[doc_id]["len"] / avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        if where:
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if all(self.docs[doc_id]["metadata"].get(key) == value for key, value in where.items())
+            }
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(id) = sum over lists of 1 / (k + rank), best first."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
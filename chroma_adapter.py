@@ -0,0 +1,73 @@
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+
+def chroma_collection(vectorstore, required: bool = False):
+    """
+    The chromadb collection behind a LangChain Chroma store, or None if this LangChain
+    version does not expose it (an error with `required`). The only place the private
+    attribute is read.
+    """
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is not None and hasattr(collection, "query"):
+        return collection
+    if required:
+        raise RuntimeError("This LangChain version does not expose the Chroma collection.")
+    return None
+
+
+def query_by_vectors(
+    vectorstore, vectors: Sequence[List[float]], k: int, where: Optional[dict] = None, require_ids: bool = True,
+) -> List[List[Tuple[str, Document, float]]]:
+    """
+    Nearest chunks for each query vector as (chunk ID, Document, distance), closest
+    first, in one batched Chroma query. Without access to the collection it falls back
+    to the public similarity_search_by_vector_with_relevance_scores (one call per vector),
+    where chunk IDs are only available if langchain-core puts them on the Documents
+    (`require_ids=False` accepts None IDs).
+    """
+    collection = chroma_collection(vectorstore)
+    if collection is None:
+        ranked = []
+        for vector in vectors:
+            hits = vectorstore.similarity_search_by_vector_with_relevance_scores(vector, k=k, filter=where)
+            if require_ids and any(getattr(doc, "id", None) is None for doc, _ in hits):
+                raise RuntimeError("This LangChain version returns search results without chunk IDs.")
+            ranked.append([(getattr(doc, "id", None), doc, distance) for doc, distance in hits])
+        return ranked
+
+    count = collection.count()
+    if count == 0:
+        return [[] for _ in vectors]
+    results = collection.query(
+        query_embeddings=list(vectors),
+        n_results=min(k, count),
+        where=where,
+        include=["documents", "metadatas", "distances"],
+    )
+    return [
+        [
+            (doc_id, Document(page_content=text, metadata=metadata or {}), distance)
+            for doc_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
+        for ids, texts, metadatas, distances in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"]
+        )
+    ]
+
+
+def relevance_score_fn(vectorstore) -> Callable[[float], float]:
+    """
+    Distance -> relevance score as similarity_search_with_relevance_scores computes it.
+    Falls back to Chroma's default space (l2 over unit-length embeddings) if the store
+    does not say.
+    """
+    select = getattr(vectorstore, "_select_relevance_score_fn", None)
+    if select is not None:
+        try:
+            return select()
+        except (NotImplementedError, ValueError):
+            pass
+    return lambda distance: 1.0 - distance / math.sqrt(2)
@@ -0,0 +1,230 @@
+import os
+import re
+import zlib
+import numpy as np
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+INDEX_FILE = "minhash_index.npz"
+
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Hashed word `size`-grams of the lower-cased text (the whole text if it is shorter)."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def figures_key(text: str) -> int:
+    """Fingerprint of the distinct numbers in a text; equal only if the same figures appear."""
+    return zlib.crc32("\0".join(sorted(set(_NUMBER.findall(text)))).encode("utf-8"))
+
+
+class MinHashIndex:
+    """
+    Near-duplicate detector for chunks: MinHash signatures over word 5-gram shingles,
+    with LSH banding so a new chunk is only compared against likely matches.
+
+    Two chunks are near-duplicates when their estimated Jaccard similarity is at least
+    `threshold` - repeated headers, disclaimers and director lists across pages and
+    reports, not merely overlapping neighbours (the splitter's 200-character overlap
+    leaves adjacent chunks far below it). They must also contain the same figures:
+    year-on-year notes that differ only in their numbers can score above the threshold,
+    and dropping one would lose the new numbers.
+
+    Chunks are only compared within one scope: the same values of the `scope_fields`
+    metadata (company and fiscal year by default), so a report's content is never dropped
+    in favour of another year's copy that a fiscal-year filter would exclude.
+
+    Keyed by chunk ID like the vector store, added to and deleted from in step with it,
+    and persisted next to it. filter() drops near-duplicates from a stream of chunks and
+    counts what it removed.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.85, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 1, scope_fields: Sequence[str] = ("company", "fiscal_year")):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.scope_fields = tuple(scope_fields)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, num_perm, dtype=np.uint64)
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.sources: Dict[str, str] = {}
+        self.scopes: Dict[str, str] = {}
+        self.figures: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [defaultdict(set) for _ in range(bands)]
+        self.dirty = False
+        self.reset_stats()
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "MinHashIndex":
+        index = cls(path, **kwargs)
+        if os.path.exists(path):
+            stored = np.load(path, allow_pickle=False)
+            # An index from an older layout is dropped and backfilled from the store
+            if stored["signatures"].shape[1:] == (index.num_perm,) and {"scopes", "figures"} <= set(stored.files):
+                for doc_id, source, scope, figures, signature in zip(
+                    stored["ids"], stored["sources"], stored["scopes"], stored["figures"], stored["signatures"]
+                ):
+                    index._insert(str(doc_id), str(source), str(scope), int(figures), signature)
+        return index
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        ids = list(self.signatures)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array(ids, dtype=str),
+                sources=np.array([self.sources[i] for i in ids], dtype=str),
+                scopes=np.array([self.scopes[i] for i in ids], dtype=str),
+                figures=np.array([self.figures[i] for i in ids], dtype=np.int64),
+                signatures=np.array([self.signatures[i] for i in ids], dtype=np.uint64).reshape(len(ids), self.num_perm),
+            )
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.signatures
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    # -----------------------------
+    # Signatures and lookup
+    # -----------------------------
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def scope(self, metadata: Optional[dict]) -> str:
+        return "\0".join(str((metadata or {}).get(field, "")) for field in self.scope_fields)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in np.split(signature, self.bands)]
+
+    def _insert(self, doc_id: str, source: str, scope: str, figures: int, signature: np.ndarray):
+        self.signatures[doc_id] = signature
+        self.sources[doc_id] = source
+        self.scopes[doc_id] = scope
+        self.figures[doc_id] = figures
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band][key].add(doc_id)
+
+    def add(self, ids: Iterable[str], texts: Iterable[str], metadatas: Optional[Iterable[dict]] = None):
+        ids, texts = list(ids), list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(ids)
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            if doc_id in self.signatures:
+                self.delete([doc_id])
+            source = str((metadata or {}).get("source", ""))
+            self._insert(doc_id, source, self.scope(metadata), figures_key(text), self.signature(text))
+            self.dirty = True
+
+    def delete(self, ids: Iterable[str]):
+        for doc_id in ids:
+            signature = self.signatures.pop(doc_id, None)
+            if signature is None:
+                continue
+            self.sources.pop(doc_id, None)
+            self.scopes.pop(doc_id, None)
+            self.figures.pop(doc_id, None)
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket = self._buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+            self.dirty = True
+
+    def find(self, signature: np.ndarray, exclude: Optional[Set[str]] = None, scope: str = "",
+             figures: Optional[int] = None) -> Optional[Tuple[str, float]]:
+        """
+        The most similar indexed chunk in `scope` at or above the threshold, as (id,
+        estimated Jaccard); with `figures`, only among chunks with the same figures_key.
+        """
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates |= self._buckets[band].get(key, set())
+        best = None
+        for doc_id in candidates:
+            if (exclude and doc_id in exclude) or self.scopes[doc_id] != scope:
+                continue
+            if figures is not None and self.figures[doc_id] != figures:
+                continue
+            similarity = float(np.mean(self.signatures[doc_id] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (doc_id, similarity)
+        return best
+
+    # -----------------------------
+    # Filtering
+    # -----------------------------
+    def filter(self, chunks: Iterable[Tuple[str, "Document"]], duplicate_of: Optional[Dict[str, str]] = None,
+               exclude: Optional[Set[str]] = None) -> Iterator[Tuple[str, "Document"]]:
+        """
+        Pass through (id, chunk) pairs that are not near-duplicates of an indexed chunk or
+        of one passed earlier in the same scope with the same figures, indexing the ones kept. Scope metadata
+        must already be on the chunks. Dropped IDs are recorded in
+        `duplicate_of` as {dropped id: kept id}. IDs in `exclude` are never matched (e.g.
+        a changed file's old chunks, about to be deleted).
+        """
+        for chunk_id, chunk in chunks:
+            text = chunk.page_content
+            source = str(chunk.metadata.get("source", ""))
+            scope = self.scope(chunk.metadata)
+            figures = figures_key(text)
+            signature = self.signature(text)
+            self.seen += 1
+            match = self.find(signature, exclude, scope, figures)
+            if match is None:
+                self._insert(chunk_id, source, scope, figures, signature)
+                self.dirty = True
+                yield chunk_id, chunk
+                continue
+            kept_id, _ = match
+            self.removed += 1
+            self.removed_chars += len(text)
+            if self.sources.get(kept_id) == source:
+                self.within_document += 1
+            else:
+                self.across_documents += 1
+            if duplicate_of is not None:
+                duplicate_of[chunk_id] = kept_id
+
+    def reset_stats(self):
+        self.seen = 0
+        self.removed = 0
+        self.removed_chars = 0
+        self.within_document = 0
+        self.across_documents = 0
+
+    def stats(self) -> Dict:
+        return {
+            "chunks_checked": self.seen,
+            "duplicates_removed": self.removed,
+            "within_document": self.within_document,
+            "across_documents": self.across_documents,
+            "removed_share": round(self.removed / self.seen, 3) if self.seen else 0.0,
+            "chars_not_embedded": self.removed_chars,
+        }
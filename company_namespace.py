@@ -0,0 +1,145 @@
+import os
+import re
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Union
+
+CATALOG_FILE = "namespaces.json"
+NAMESPACE_DIR = "namespaces"
+
+# Digit look-arounds rather than \b, which does not fire next to "_" (annual_report_2023-24.pdf)
+_FY = re.compile(r"(?<![a-z])FY\s?'?((?:19|20)?\d{2})(?:\s?[-–/]\s?((?:19|20)?\d{2}))?(?!\d)", re.IGNORECASE)
+_YEAR_RANGE = re.compile(r"(?<!\d)((?:19|20)\d{2})\s?[-–/]\s?((?:19|20)?\d{2})(?!\d)")
+_YEAR_ENDED = re.compile(r"\b(?:fiscal|financial)?\s*year\s+end(?:ed|ing)\b[^.\n]{0,40}?(?<!\d)((?:19|20)\d{2})(?!\d)", re.IGNORECASE)
+_YEAR = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+
+def company_slug(name: str) -> str:
+    """
+    Stable namespace key for a company name: lower-case alphanumerics joined by '-', at
+    most 48 characters and never ending in '-' (Chroma collection names must end with an
+    alphanumeric character).
+    """
+    return "-".join(re.findall(r"[a-z0-9]+", name.lower()))[:48].rstrip("-") or "unknown"
+
+
+def company_identity(validated: Union[str, Dict, List[str]]) -> Dict:
+    """
+    Company identity from NameValidationAgent output ({"company_names": [...]}, as JSON
+    or parsed) or a plain name: the first name is canonical, the rest are aliases.
+    """
+    if isinstance(validated, str):
+        try:
+            validated = json.loads(validated)
+        except ValueError:
+            validated = [validated]
+    names = validated.get("company_names", []) if isinstance(validated, dict) else list(validated)
+    names = [name.strip() for name in names if name and name.strip()]
+    if not names:
+        raise ValueError("No company name to build a namespace from.")
+    return {"company": company_slug(names[0]), "company_name": names[0], "aliases": names[1:]}
+
+
+def _four_digit(year: str, reference: str) -> str:
+    return year if len(year) == 4 else reference[:2] + year
+
+
+def _range_end(start: str, end: Optional[str]) -> Optional[str]:
+    """The ending year of a "2023-24" style range, or None if `end` does not follow `start`."""
+    if end is None:
+        return None
+    end = _four_digit(end, start)
+    return end if int(end) == int(start) + 1 else None
+
+
+def detect_fiscal_year(filename: str, texts: Iterable[str] = ()) -> str:
+    """
+    Fiscal year of a report as "FY2024", from its file name or opening pages: "FY24",
+    "2023-24" or "FY2023-24" (the year ending), "year ended March 31, 2024", else the most frequent
+    year mentioned (the latest on a tie). Empty if none is found.
+    """
+    for text in [filename, *texts]:
+        match = _FY.search(text)
+        if match:
+            start = _four_digit(match.group(1), "2000")
+            return "FY" + (_range_end(start, match.group(2)) or start)
+        match = _YEAR_RANGE.search(text)
+        if match and _range_end(match.group(1), match.group(2)):
+            return "FY" + _range_end(match.group(1), match.group(2))
+        match = _YEAR_ENDED.search(text)
+        if match:
+            return "FY" + match.group(1)
+    years = Counter(year for text in texts for year in _YEAR.findall(text))
+    return "FY" + max(years, key=lambda year: (years[year], year)) if years else ""
+
+
+class NamespaceCatalog:
+    """
+    Per-company partitions of the report store.
+
+    Each company gets its own Chroma collection and its own manifest and side indexes
+    under <persist_directory>/namespaces/<company>/, so a search scans only that
+    company's chunks. The catalog records each company's name and aliases and which
+    company (and fiscal year) each ingested file belongs to. Stored as JSON next to the
+    store.
+    """
+
+    def __init__(self, persist_directory: str):
+        self.persist_directory = persist_directory
+        self.path = os.path.join(persist_directory, CATALOG_FILE)
+        self.companies: Dict[str, Dict] = {}
+        self.files: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                stored = json.load(f)
+            self.companies = stored.get("companies", {})
+            self.files = stored.get("files", {})
+
+    def save(self):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"companies": self.companies, "files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def register_company(self, identity: Dict) -> str:
+        """
+        Namespace for a company identity. If its canonical name or any alias already
+        resolves to a namespace ("X Ltd" vs "X Limited" from separate validations), that
+        one is reused and the new names are added as aliases; otherwise one is created.
+        """
+        names = [identity["company_name"], *identity.get("aliases", [])]
+        company = next((found for found in map(self.resolve, names) if found is not None), identity["company"])
+        entry = self.companies.setdefault(company, {"name": identity["company_name"], "aliases": []})
+        entry["aliases"] = sorted(name for name in set(entry["aliases"]) | set(names) if company_slug(name) != company)
+        return company
+
+    def assign(self, filename: str, company: str, fiscal_year: str = ""):
+        """File `filename` belongs to `company`'s namespace (moving it out of any other)."""
+        self.files[filename] = {"company": company, "fiscal_year": fiscal_year}
+
+    def files_for(self, company: str) -> List[str]:
+        return sorted(name for name, entry in self.files.items() if entry["company"] == company)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Namespace for a company name, matching canonical names and aliases."""
+        slug = company_slug(name)
+        for company, entry in self.companies.items():
+            if slug == company or slug in (company_slug(alias) for alias in entry["aliases"]):
+                return company
+        return None
+
+    def chunk_metadata(self, filename: str) -> Dict:
+        """Metadata every chunk of a file is tagged with."""
+        entry = self.files[filename]
+        return {
+            "company": entry["company"],
+            "company_name": self.companies[entry["company"]]["name"],
+            "fiscal_year": entry["fiscal_year"],
+        }
+
+    def collection_name(self, company: str) -> str:
+        return f"company_{company}"
+
+    def directory(self, company: str) -> str:
+        return os.path.join(self.persist_directory, NAMESPACE_DIR, company)
@@ -0,0 +1,197 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from file_hash import file_sha256
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+CACHE_DIR = "parsed_docs"
+
+# Figures as they appear in statements: 1,234.5  (1,234)  -12.5%  2024
+FIGURE = re.compile(r"(?<![\w.])\(?-?\d[\d,]*(?:\.\d+)?\)?%?(?![\w.])")
+
+# A run of at least this many consecutive figure rows is a candidate table region
+MIN_TABLE_LINES = 3
+
+
+def figure_count(line: str) -> int:
+    """Figures on a line if it reads like a table row (2+ figures making up 30%+ of its tokens), else 0."""
+    figures = len(FIGURE.findall(line))
+    return figures if figures >= 2 and figures >= 0.3 * len(line.split()) else 0
+
+
+def layout_hints(text: str) -> Tuple[Dict, List[List[int]]]:
+    """
+    Cheap layout signals for one page of extracted text, and its candidate table
+    regions as inclusive [first_line, last_line] spans of table-row-like lines.
+    """
+    lines = text.splitlines()
+    numeric_lines = [figure_count(line) > 0 for line in lines]
+    regions, start = [], None
+    for i, is_numeric in enumerate(numeric_lines + [False]):
+        if is_numeric and start is None:
+            start = i
+        elif not is_numeric and start is not None:
+            if i - start >= MIN_TABLE_LINES:
+                regions.append([start, i - 1])
+            start = None
+    tokens = text.split()
+    hints = {
+        "chars": len(text),
+        "lines": len(lines),
+        "numeric_lines": sum(numeric_lines),
+        "numeric_ratio": round(sum(1 for t in tokens if FIGURE.fullmatch(t)) / len(tokens), 3) if tokens else 0.0,
+    }
+    return hints, regions
+
+
+class ParsedDocument:
+    """
+    One PDF parsed once: per-page text, layout hints and candidate table regions, plus
+    the tables extracted from it (None until table extraction has run) and the pages
+    extraction was run on (None for all of them).
+    """
+
+    def __init__(self, sha256: str, pages: List[Dict], tables: Optional[List] = None, tables_pages: Optional[List[int]] = None):
+        self.sha256 = sha256
+        self.pages = pages
+        self.tables = tables  # [(page, order, rows), ...]
+        self.tables_pages = tables_pages
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def documents(self, source: str) -> List["Document"]:
+        """Pages as LangChain Documents, with the same metadata PyPDFLoader gives."""
+        from langchain_core.documents import Document
+        return [Document(page_content=page["text"], metadata={"source": source, "page": i}) for i, page in enumerate(self.pages)]
+
+    def table_candidate_pages(self) -> List[int]:
+        """1-based numbers of pages with at least one candidate table region."""
+        return [i + 1 for i, page in enumerate(self.pages) if page["table_regions"]]
+
+    def to_json(self) -> Dict:
+        return {"sha256": self.sha256, "pages": self.pages, "tables": self.tables, "tables_pages": self.tables_pages}
+
+
+class DocumentCache:
+    """
+    Parse-once store for PDFs, keyed by content hash and persisted as JSON.
+
+    The first reader of a file (validation, chunking or table extraction) parses it with
+    pypdf and records each page's text, layout hints and candidate table regions; every
+    later reader, in this run or the next, gets the stored result. Renamed or re-uploaded
+    copies of the same bytes share one entry. Recently used documents are also kept in
+    memory.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_in_memory: int = 8):
+        self.directory = directory
+        self.max_in_memory = max_in_memory
+        self.hits = 0
+        self.misses = 0
+        self.parse_seconds = 0.0
+        self._docs: "OrderedDict[str, ParsedDocument]" = OrderedDict()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.RLock()
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.directory, f"{sha256}.json")
+
+    def digest(self, path: str) -> str:
+        """Content hash of a file, remembered while its size and mtime are unchanged."""
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        if key not in self._digests:
+            self._digests[key] = file_sha256(path)
+        return self._digests[key]
+
+    def _remember(self, doc: ParsedDocument):
+        with self._lock:
+            self._docs[doc.sha256] = doc
+            self._docs.move_to_end(doc.sha256)
+            while len(self._docs) > self.max_in_memory:
+                self._docs.popitem(last=False)
+
+    def _lookup(self, sha256: str) -> Optional[ParsedDocument]:
+        with self._lock:
+            doc = self._docs.get(sha256)
+            if doc is not None:
+                self._docs.move_to_end(sha256)
+                return doc
+        if os.path.exists(self._path(sha256)):
+            with open(self._path(sha256)) as f:
+                stored = json.load(f)
+            doc = ParsedDocument(sha256, stored["pages"], stored.get("tables"), stored.get("tables_pages"))
+            self._remember(doc)
+            return doc
+        return None
+
+    def _save(self, doc: ParsedDocument):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(doc.sha256) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(doc.to_json(), f)
+        os.replace(tmp_path, self._path(doc.sha256))
+        self._remember(doc)
+
+    def _parse_pages(self, path: str) -> Iterator[Dict]:
+        from pypdf import PdfReader
+
+        for page in PdfReader(path).pages:
+            text = page.extract_text()
+            hints, regions = layout_hints(text)
+            yield {"text": text, "hints": hints, "table_regions": regions}
+
+    def iter_pages(self, path: str) -> Iterator["Document"]:
+        """
+        Yield the pages of a PDF as Documents. A cached file is read back; otherwise it
+        is parsed page by page as the pages are consumed and stored once fully read.
+        """
+        from langchain_core.documents import Document
+
+        sha256 = self.digest(path)
+        doc = self._lookup(sha256)
+        if doc is not None:
+            self.hits += 1
+            yield from doc.documents(path)
+            return
+
+        self.misses += 1
+        pages, started = [], time.perf_counter()
+        for page in self._parse_pages(path):
+            pages.append(page)
+            yield Document(page_content=page["text"], metadata={"source": path, "page": len(pages) - 1})
+        self.parse_seconds += time.perf_counter() - started
+        with self._lock:
+            cached = self._lookup(sha256)
+            if cached is None:
+                self._save(ParsedDocument(sha256, pages))
+
+    def get(self, path: str) -> ParsedDocument:
+        """The parsed document for a PDF, parsing it now if it has not been seen."""
+        doc = self._lookup(self.digest(path))
+        if doc is not None:
+            self.hits += 1
+            return doc
+        for _ in self.iter_pages(path):
+            pass
+        return self._lookup(self.digest(path))
+
+    def set_tables(self, path: str, tables: List, pages: Optional[List[int]] = None):
+        """Store the tables extracted from a PDF as (page, order, rows) tuples, and the pages scanned (None: all)."""
+        with self._lock:
+            doc = self.get(path)
+            doc.tables = [[page, order, rows] for page, order, rows in tables]
+            doc.tables_pages = sorted(pages) if pages is not None else None
+            self._save(doc)
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "parse_seconds": round(self.parse_seconds, 2)}
@@ -0,0 +1,143 @@
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+CACHE_PATH = "embedding_cache.sqlite"
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so trivially different copies share a key."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embedding wrapper that remembers every vector it has produced.
+
+    Vectors are keyed by (model, SHA-256 of the normalized text) and stored as float32
+    blobs in SQLite, so identical text is only ever embedded once per model, across runs
+    and across modules. The cache is bounded to `max_entries`: once exceeded, the least
+    recently used vectors are evicted down to 95% of it, so eviction (and the row count it
+    re-reads) happens once per batch of turnover rather than on every store. `hits` and
+    `misses` count texts served from / sent past the cache.
+
+    Wraps either a LangChain embedder (embed_documents / embed_query) or a Chroma
+    embedding function (called with a list of texts), and can itself be used as either.
+    """
+
+    def __init__(self, inner, model: Optional[str] = None, cache_path: str = CACHE_PATH, max_entries: int = 500_000):
+        self.inner = inner
+        self.model = model or getattr(inner, "model", None) or getattr(inner, "deployment", None) or type(inner).__name__
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+        # Row count kept incrementally; re-read only when eviction is due (other processes may share the file)
+        (self._count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    # -----------------------------
+    # Cache internals
+    # -----------------------------
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        if hasattr(self.inner, "embed_documents"):
+            return self.inner.embed_documents(texts)
+        return [list(v) for v in self.inner(texts)]
+
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model, *batch],
+                ).fetchall()
+                found.update((h, np.frombuffer(v, dtype=np.float32)) for h, v in rows)
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, self.model, h) for h in found],
+                )
+                self._db.commit()
+        return found
+
+    def _store(self, items: dict):
+        now = time.time()
+        with self._lock:
+            # A vector another thread stored meanwhile is the same one, so existing rows are kept
+            inserted = self._db.executemany(
+                "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)",
+                [(self.model, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items.items()],
+            ).rowcount
+            self._count += max(inserted, 0)
+            if self._count > self.max_entries:
+                (self._count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+                if self._count > self.max_entries:
+                    evict = self._count - int(self.max_entries * 0.95)
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (evict,),
+                    )
+                    self._count -= evict
+            self._db.commit()
+
+    # -----------------------------
+    # Embeddings interface
+    # -----------------------------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        cached = self._lookup(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        misses = sum(1 for k in keys if k in missing)
+        # embed_texts calls this from worker threads
+        with self._lock:
+            self.hits += len(texts) - misses
+            self.misses += misses
+
+        if missing:
+            vectors = self._embed_uncached(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(fresh)
+            cached.update((k, np.asarray(v, dtype=np.float32)) for k, v in fresh.items())
+
+        return [cached[k].tolist() for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Chroma embedding-function interface."""
+        return self.embed_documents(list(input))
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
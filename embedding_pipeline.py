@@ -0,0 +1,153 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:  # Fall back to the ~4 characters per token rule of thumb
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def token_batches(texts: Sequence[str], max_tokens: int = 8000, max_items: int = 256) -> List[List[int]]:
+    """
+    Group text indices into batches bounded by an estimated token budget and item count.
+    A single text larger than the budget gets a batch of its own.
+    """
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait if `error` is a rate-limit (HTTP 429) response, else None."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status != 429 and type(error).__name__ != "RateLimitError":
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that backs off on rate limiting and recovers on success
+    (halve on 429, add one slot after `recover_after` consecutive successes).
+    """
+
+    def __init__(self, max_concurrency: int, recover_after: int = 5):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.recover_after = recover_after
+        self.active = 0
+        self.throttled = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.active -= 1
+            if throttled:
+                self.throttled += 1
+                self._successes = 0
+                self.limit = max(1, self.limit // 2)
+            else:
+                self._successes += 1
+                if self._successes >= self.recover_after and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+def embed_texts(
+    embed_fn: Callable[[List[str]], List[List[float]]],
+    texts: Sequence[str],
+    max_tokens: int = 8000,
+    max_concurrency: int = 8,
+    max_retries: int = 6,
+) -> List[List[float]]:
+    """
+    Embed texts in token-bounded batches on a bounded worker pool.
+
+    Rate-limited batches wait for the server's Retry-After (or exponential backoff) and
+    shrink the allowed concurrency; it grows back as requests succeed. Prints chunks/s
+    and tokens/s when done.
+
+    Args:
+      embed_fn: Callable taking a list of texts and returning their vectors
+        (e.g. embedder.embed_documents or a Chroma embedding function).
+      texts: Texts to embed.
+
+    Returns:
+      list: One vector per input text, in input order.
+    """
+    texts = list(texts)
+    batches = token_batches(texts, max_tokens=max_tokens)
+    limiter = AdaptiveLimiter(max_concurrency)
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    total_tokens = sum(count_tokens(t) for t in texts)
+    started = time.perf_counter()
+
+    def run(batch: List[int]):
+        for attempt in range(max_retries + 1):
+            limiter.acquire()
+            try:
+                result = embed_fn([texts[i] for i in batch])
+            except Exception as e:
+                wait = _retry_after(e)
+                limiter.release(throttled=wait is not None)
+                if wait is None or attempt == max_retries:
+                    raise
+                time.sleep(wait or min(60.0, 2 ** attempt + random.random()))
+                continue
+            limiter.release()
+            for i, vector in zip(batch, result):
+                vectors[i] = list(vector)
+            return
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        list(pool.map(run, batches))
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(
+        f"Embedded {len(texts)} chunks ({total_tokens} tokens) in {len(batches)} batches, {elapsed:.1f}s: "
+        f"{len(texts) / elapsed:.1f} chunks/s, {total_tokens / elapsed:.0f} tokens/s, "
+        f"{limiter.throttled} rate-limited"
+    )
+    return vectors
+
+
+def add_in_batches(collection, ids, documents, metadatas, embeddings, batch_size: int = 1000):
+    """Write pre-computed embeddings to a Chroma collection in large add() calls."""
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.add(
+            ids=ids[start:end],
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+            embeddings=embeddings[start:end],
+        )
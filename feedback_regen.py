@@ -0,0 +1,67 @@
+import re
+from typing import List, Set
+
+# Feedback mentioning these needs fresh research from that stage; anything else is
+# treated as a narrative-only edit (wording, structure, emphasis, length, ...)
+STAGE_KEYWORDS = {
+    "finance": [
+        "stock", "share price", "market cap", "news", "sentiment", "analyst", "ratio", "fundamental",
+        "valuation", "dividend", "yfinance", "latest", "recent", "current price",
+    ],
+    "rag": [
+        "annual report", "balance sheet", "cash flow", "income statement", "profit and loss", "debt",
+        "liquidity", "leverage", "covenant", "refinanc", "acquisition", "merger", "management change",
+        "subsidiar", "segment", "document", "knowledge base", "missing data", "figures", "metrics",
+    ],
+}
+
+
+def affected_stages(feedback: str) -> Set[str]:
+    """
+    Pipeline stages a piece of feedback needs re-run. The narrative is always one of them,
+    and so is the risk score, which is generated from the narrative.
+    """
+    text = feedback.lower()
+    stages = {"narrative", "score"}
+    for stage, keywords in STAGE_KEYWORDS.items():
+        if any(re.search(r"\b" + re.escape(kw), text) for kw in keywords):
+            stages.add(stage)
+    return stages
+
+
+class FeedbackHistory:
+    """
+    Accumulated reviewer feedback, compacted to a bounded summary for prompts.
+
+    The latest `keep_recent` items are kept close to verbatim; older ones are reduced
+    to their first sentence, duplicates dropped, and the whole summary is capped at
+    `max_chars` (oldest points go first), so the prompt no longer grows with every round.
+    """
+
+    def __init__(self, keep_recent: int = 3, max_item_chars: int = 600, max_chars: int = 2000):
+        self.keep_recent = keep_recent
+        self.max_item_chars = max_item_chars
+        self.max_chars = max_chars
+        self.items: List[str] = []
+
+    def add(self, feedback: str):
+        feedback = re.sub(r"\s+", " ", feedback).strip()
+        if feedback and feedback not in self.items:
+            self.items.append(feedback)
+
+    def summary(self) -> str:
+        older, recent = self.items[:-self.keep_recent], self.items[-self.keep_recent:]
+        points = []
+        for item in older:
+            first = re.split(r"(?<=[.!?])\s", item, maxsplit=1)[0][:200]
+            if first not in points:
+                points.append(first)
+        points += [item[:self.max_item_chars] for item in recent]
+
+        lines = [f"- {point}" for point in points]
+        while len(lines) > 1 and sum(len(line) + 1 for line in lines) > self.max_chars:
+            lines.pop(0)
+        return "\n".join(lines)[:self.max_chars]
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
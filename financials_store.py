@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from file_hash import file_sha256
+
+# Source workbook and the directory holding its compiled, memory-mappable form
+FINANCIALS_PATH = "Company_Financials_FY2024.xlsx"
+STORE_DIR = "financials_store"
+INDEX_FILE = "index.json"
+LOCK_FILE = "build.lock"
+
+# A build lock older than this is assumed to be left behind by a crashed process
+LOCK_STALE_SECONDS = 600
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The metric columns as numbers. Columns pandas read as text because of formatting
+    ("1,234", "12.5%", "(340)") are parsed; cells that still do not parse become NaN,
+    and columns with no numbers at all are left out. Both are reported.
+    """
+    numeric = {}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        if not pd.api.types.is_numeric_dtype(values):
+            text = values.astype("string").str.strip()
+            text = text.str.replace(r"^\((.*)\)$", r"-\1", regex=True).str.replace(r"[,%\s]", "", regex=True)
+            parsed = pd.to_numeric(text, errors="coerce")
+            if parsed.notna().sum() == 0:
+                if values.notna().any():
+                    print(f"Financials store: skipping non-numeric column '{col}'.")
+                continue
+            unparsed = int((values.notna() & parsed.isna()).sum())
+            if unparsed:
+                print(f"Financials store: {unparsed} non-numeric value(s) in '{col}' stored as missing.")
+            values = parsed.astype(np.float64)
+        numeric[col] = values
+    return pd.DataFrame(numeric, index=df.index)
+
+
+class FinancialsStore:
+    """
+    Columnar, memory-mapped copy of the FY2024 financials workbook with a ticker -> row index.
+
+    The workbook is parsed once into a float64 matrix (one column per numeric field) saved as
+    a .npy file and opened with mmap_mode="r", so any number of processes share the same
+    pages through the OS cache. index.json maps each ticker to its row and records the
+    source file's size, mtime and SHA-256; the store is rebuilt in full when the workbook
+    changes. Each build writes a new values file and swaps index.json atomically, so
+    readers never see a half-written store. Processes sharing the directory re-read
+    index.json before deciding to rebuild, and builds take a lock file, so one change
+    is rebuilt by one process and the others load its result.
+    """
+
+    def __init__(self, source_path: str = FINANCIALS_PATH, store_dir: str = STORE_DIR, check_interval: float = 5.0):
+        self.source_path = source_path
+        self.store_dir = store_dir
+        self.check_interval = check_interval
+        self._index: Dict[str, Any] = {}
+        self._rows: Dict[str, int] = {}
+        self._columns: list = []
+        self._values: Optional[np.ndarray] = None
+        self._index_stamp: Optional[Tuple[int, int]] = None
+        self._last_check = 0.0
+        self.refresh(force=True)
+
+    # -----------------------------
+    # Build / refresh
+    # -----------------------------
+    def _source_stat(self):
+        st = os.stat(self.source_path)
+        return st.st_size, st.st_mtime_ns
+
+    def _load(self) -> bool:
+        index_path = os.path.join(self.store_dir, INDEX_FILE)
+        for attempt in range(3):
+            try:
+                stamp = _stamp(index_path)
+                with open(index_path) as f:
+                    index = json.load(f)
+                values = np.load(os.path.join(self.store_dir, index["values_file"]), mmap_mode="r")
+                break
+            except FileNotFoundError:
+                # No store yet, or another process replaced it between the two reads
+                if not os.path.exists(index_path) or attempt == 2:
+                    return False
+        self._values = values
+        self._index = index
+        self._index_stamp = stamp
+        self._rows = index["tickers"]
+        self._columns = index["columns"]
+        return True
+
+    def _reload_if_replaced(self):
+        """Pick up a store another process built since this one was loaded."""
+        stamp = _stamp(os.path.join(self.store_dir, INDEX_FILE))
+        if stamp is not None and stamp != self._index_stamp:
+            self._load()
+
+    def _write_atomic(self, name: str, write, mode: str = "w"):
+        # A per-process temporary name, so concurrent writers never share a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, prefix=name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            os.replace(tmp_path, os.path.join(self.store_dir, name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_index(self, index: Dict[str, Any]):
+        self._write_atomic(INDEX_FILE, lambda f: json.dump(index, f))
+        self._index_stamp = _stamp(os.path.join(self.store_dir, INDEX_FILE))
+
+    @contextmanager
+    def _build_lock(self, wait: bool):
+        """
+        Hold the store's build lock (an exclusively created lock file), yielding whether
+        it was acquired. With wait=False a build already running elsewhere is not waited
+        for. A lock older than LOCK_STALE_SECONDS is taken to be left by a crashed build.
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        lock_path = os.path.join(self.store_dir, LOCK_FILE)
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                stamp = _stamp(lock_path)
+                if stamp is not None and time.time() - stamp[0] / 1e9 > LOCK_STALE_SECONDS:
+                    try:
+                        os.remove(lock_path)
+                    except OSError:
+                        pass
+                    continue
+                if not wait:
+                    yield False
+                    return
+                time.sleep(0.2)
+        try:
+            yield True
+        finally:
+            os.remove(lock_path)
+
+    def _is_current(self) -> bool:
+        """Whether the loaded store was built from the workbook as it is now."""
+        size, mtime_ns = self._source_stat()
+        if size == self._index["source_size"] and mtime_ns == self._index["source_mtime_ns"]:
+            return True
+        if file_sha256(self.source_path) == self._index["source_hash"]:
+            # Touched but unchanged: just record the new stat
+            self._index.update(source_size=size, source_mtime_ns=mtime_ns)
+            self._write_index(self._index)
+            return True
+        return False
+
+    def build(self):
+        """
+        Parse the workbook and rewrite the store in full, reporting which tickers changed.
+        Callers hold the build lock (see refresh()).
+        """
+        df = pd.read_excel(self.source_path)
+        if "Company" not in df.columns:
+            raise ValueError("Excel file must have a 'Company' column.")
+
+        # First row wins for duplicated tickers, matching df[df['Company'] == ticker].iloc[0]
+        df = df.drop_duplicates(subset="Company", keep="first").reset_index(drop=True)
+        numeric = _numeric_columns(df.drop(columns=["Company"]))
+        values = numeric.to_numpy(dtype=np.float64)
+        tickers = {str(t): i for i, t in enumerate(df["Company"])}
+        source_hash = file_sha256(self.source_path)
+
+        if self._values is not None:
+            self._report_changes(tickers, list(numeric.columns), values)
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        values_file = f"values-{source_hash[:16]}.npy"
+        if not os.path.exists(os.path.join(self.store_dir, values_file)):
+            self._write_atomic(values_file, lambda f: np.save(f, values), mode="wb")
+
+        size, mtime_ns = self._source_stat()
+        self._write_index({
+            "source_path": self.source_path,
+            "source_size": size,
+            "source_mtime_ns": mtime_ns,
+            "source_hash": source_hash,
+            "values_file": values_file,
+            "columns": list(numeric.columns),
+            "tickers": tickers,
+        })
+        # Map the new values file (releasing the old mapping) before removing old ones. On
+        # Windows a file still mapped, e.g. by another process, cannot be removed yet; it
+        # is retried on the next build.
+        self._values = None
+        self._load()
+        for name in os.listdir(self.store_dir):
+            if name.startswith("values-") and name.endswith(".npy") and name != values_file:
+                try:
+                    os.remove(os.path.join(self.store_dir, name))
+                except OSError:
+                    pass
+        print(f"Financials store built: {len(tickers)} companies x {len(numeric.columns)} fields -> {self.store_dir}")
+
+    def _report_changes(self, tickers: Dict[str, int], columns: list, values: np.ndarray):
+        if columns != self._columns:
+            print("Financials store: column layout changed since the previous build.")
+            return
+        old_rows, old_values = self._rows, self._values
+        added = [t for t in tickers if t not in old_rows]
+        removed = [t for t in old_rows if t not in tickers]
+        changed = [
+            t for t, i in tickers.items()
+            if t in old_rows and not np.array_equal(values[i], old_values[old_rows[t]], equal_nan=True)
+        ]
+        print(f"Financials store: {len(added)} added, {len(changed)} changed, {len(removed)} removed since the previous build.")
+
+    def refresh(self, force: bool = False):
+        """
+        Rebuild the store if the source workbook is newer than the indexed copy. The index
+        on disk is re-read first, so a store another process rebuilt is picked up rather
+        than rebuilt again; only one process builds at a time.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        self._reload_if_replaced()
+        if self._index and (not os.path.exists(self.source_path) or self._is_current()):
+            return  # Up to date, or the workbook is not deployed alongside the store
+
+        # With no store yet there is nothing to serve, so wait for a build running elsewhere
+        with self._build_lock(wait=not self._index) as acquired:
+            if not acquired:
+                return  # Another process is rebuilding; keep serving the current store
+            self._reload_if_replaced()
+            if self._index and self._is_current():
+                return
+            if self._index:
+                print(f"{self.source_path} changed; rebuilding financials store...")
+            self.build()
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, ticker: str) -> Optional[Dict[str, Optional[float]]]:
+        """Return {column: value} for a ticker (NaN as None), or None if the ticker is unknown."""
+        self.refresh()
+        i = self._rows.get(ticker)
+        if i is None:
+            return None
+        return {
+            col: (None if np.isnan(v) else float(v))
+            for col, v in zip(self._columns, self._values[i])
+        }
+
+
+_store: Optional[FinancialsStore] = None
+
+
+def get_store() -> FinancialsStore:
+    """Process-wide financials store, opened on first use."""
+    global _store
+    if _store is None:
+        _store = FinancialsStore()
+    return _store
+
+
+if __name__ == "__main__":
+    store = FinancialsStore()
+    print(f"{len(store)} companies indexed in {store.store_dir}.")
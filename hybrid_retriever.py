@@ -0,0 +1,53 @@
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from bm25_index import reciprocal_rank_fusion
+from chroma_adapter import query_by_vectors
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense (Chroma) + sparse (BM25) retrieval fused with reciprocal-rank fusion.
+
+    Each side returns its top `fetch_k` chunk IDs; the fused top `k` are returned. Exact
+    line items and figures ("Interest Coverage Ratio FY2024", "EBITDA") that embeddings
+    blur are picked up by the keyword side, paraphrases by the dense side. Drop-in
+    replacement for `db.as_retriever()`.
+
+    Queries are embedded with `embeddings` (the store's own embedder if not given). With a
+    `dense_index` (ann_index.ANNIndex) the dense side is served from that local index
+    instead of the Chroma collection.
+    """
+
+    vectorstore: Any = None
+    sparse_index: Any
+    dense_index: Any = None
+    embeddings: Any = None
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    where: Optional[dict] = None
+
+    def _dense(self, query: str) -> dict:
+        embeddings = self.embeddings or self.vectorstore.embeddings
+        if self.dense_index is not None:
+            hits = self.dense_index.search(embeddings.embed_query(query), k=self.fetch_k, where=self.where)
+            return {doc_id: self.dense_index.document(doc_id) for doc_id, _ in hits}
+        hits = query_by_vectors(self.vectorstore, [embeddings.embed_query(query)], k=self.fetch_k, where=self.where)[0]
+        return {doc_id: document for doc_id, document, _ in hits}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        dense = self._dense(query)
+        sparse = [doc_id for doc_id, _ in self.sparse_index.search(query, k=self.fetch_k, where=self.where)]
+
+        documents = []
+        for doc_id, _ in reciprocal_rank_fusion([list(dense), sparse], k=self.rrf_k)[:self.k]:
+            if doc_id in dense:
+                documents.append(dense[doc_id])
+            else:
+                doc = self.sparse_index.docs[doc_id]
+                documents.append(Document(page_content=doc["text"], metadata=doc["metadata"]))
+        return documents
@@ -0,0 +1,195 @@
+import os
+import json
+import hashlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from pdf_stream import batched, iter_chunks, iter_pdf_pages
+from file_hash import file_sha256
+
+MANIFEST_FILE = "ingest_manifest.json"
+
+
+def iter_chunk_ids(source: str, chunks) -> Iterator[Tuple[str, object]]:
+    """
+    Pair chunks with deterministic IDs: a hash of the source file name and chunk text,
+    suffixed with an occurrence counter so identical chunks within one file stay
+    distinct. Re-ingesting the same content always yields the same IDs, and unchanged
+    chunks of an edited file keep theirs. Works lazily over a stream of chunks.
+    """
+    seen = defaultdict(int)
+    name = os.path.basename(source)
+    for chunk in chunks:
+        text_hash = hashlib.sha256(f"{name}\0{chunk.page_content}".encode("utf-8")).hexdigest()[:32]
+        yield f"{text_hash}-{seen[text_hash]}", chunk
+        seen[text_hash] += 1
+
+
+def _unseen_chunks(chunks, known_ids: set, seen_ids: list):
+    """Pass through (id, chunk) pairs not already stored, recording every ID seen."""
+    for chunk_id, chunk in chunks:
+        seen_ids.append(chunk_id)
+        if chunk_id not in known_ids:
+            yield chunk_id, chunk
+
+
+def _tagged(chunks, metadata: Dict):
+    """Pass through (id, chunk) pairs with `metadata` added to each chunk."""
+    for chunk_id, chunk in chunks:
+        chunk.metadata.update(metadata)
+        yield chunk_id, chunk
+
+
+def _backfill_index(db, index, ids: List[str]) -> int:
+    """Index chunks that are in the store but not yet in a side index (read back, not re-embedded)."""
+    missing = [i for i in ids if i not in index]
+    if not missing:
+        return 0
+    stored = db.get(ids=missing, include=["documents", "metadatas"])
+    index.add(stored["ids"], stored["documents"], stored["metadatas"])
+    return len(stored["ids"])
+
+
+class IngestManifest:
+    """
+    Records, per ingested file, its content hash and the IDs of the chunks it produced.
+    Stored as JSON next to the vector store it describes.
+    """
+
+    def __init__(self, persist_directory: str):
+        self.path = os.path.join(persist_directory, MANIFEST_FILE)
+        self.files: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.files = json.load(f).get("files", {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def sync_directory(db, directory: str, persist_directory: str, text_splitter=None, batch_size: int = 64, sparse_index=None,
+                   dedup_index=None, files=None, chunk_metadata=None) -> Dict[str, int]:
+    """
+    Bring a LangChain vector store in line with the PDFs in a directory.
+
+    Only new or changed files are loaded and split; of their chunks, only those whose IDs
+    are not already in the store are embedded. Chunks that no longer exist (edited or
+    removed files) are deleted. Safe to call repeatedly.
+
+    With a `sparse_index` (e.g. BM25Index) the same chunk IDs are added to and deleted
+    from it in step with the store. Chunks already in the store but missing from the
+    index are backfilled from the store, without re-embedding.
+
+    With a `dedup_index` (chunk_dedup.MinHashIndex) chunks that are near-duplicates of a
+    stored chunk, or of an earlier chunk in the run, in the same scope (company and
+    fiscal year from `chunk_metadata`) are not embedded. The manifest
+    records which kept chunk each dropped one duplicated; if that chunk is later
+    deleted, the file the duplicate came from is re-ingested so its content is not lost.
+
+    `files` restricts the store to a subset of the directory (e.g. one company's reports);
+    other PDFs are treated as absent. `chunk_metadata(filename)` returns extra metadata
+    (company, fiscal year, ...) for every chunk of a file.
+
+    Args:
+      db: LangChain vector store supporting add_documents(ids=...) and delete(ids=...).
+      directory (str): Folder containing the PDFs.
+      persist_directory (str): Where the manifest is kept (the store's directory).
+      text_splitter: Splitter to chunk pages with; defaults to 1000/200 recursive splitting.
+      batch_size (int): Chunks per add_documents call while streaming a file.
+      sparse_index: Optional keyword index with add(ids, texts, metadatas), delete(ids) and save().
+      dedup_index: Optional near-duplicate index with filter(...), add, delete and save().
+      files: Optional file names to include; defaults to every PDF in the directory.
+      chunk_metadata: Optional callable mapping a file name to metadata added to its chunks.
+
+    Returns:
+      dict: Counts of files skipped/ingested/removed and chunks added/deleted/deduplicated.
+    """
+    if text_splitter is None:
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    manifest = IngestManifest(persist_directory)
+    stats = defaultdict(int)
+    side_indexes = [index for index in (sparse_index, dedup_index) if index is not None]
+    deleted = set()
+
+    def delete_chunks(ids):
+        db.delete(ids=ids)
+        for index in side_indexes:
+            index.delete(ids)
+        deleted.update(ids)
+        stats["chunks_deleted"] += len(ids)
+
+    def backfill(ids):
+        for index in side_indexes:
+            stats["chunks_indexed"] += _backfill_index(db, index, ids)
+
+    def ingest(filename, path, digest, previous):
+        # Stream pages -> chunks -> store; only chunk IDs are kept in memory
+        old_ids = set(previous["chunk_ids"]) if previous else set()
+        ids, duplicate_of = [], {}
+        chunks = _unseen_chunks(iter_chunk_ids(filename, iter_chunks(iter_pdf_pages(path), text_splitter)), old_ids, ids)
+        # Metadata goes on before deduplication, which only compares chunks of one scope.
+        # The file's hash is kept in the manifest only: chunks an edit leaves unchanged are
+        # not rewritten, so a per-chunk copy would go stale.
+        if chunk_metadata is not None:
+            chunks = _tagged(chunks, chunk_metadata(filename))
+        if dedup_index is not None:
+            chunks = dedup_index.filter(chunks, duplicate_of, exclude=old_ids)
+        for batch in batched(chunks, batch_size):
+            db.add_documents([c for _, c in batch], ids=[i for i, _ in batch])
+            if sparse_index is not None:
+                sparse_index.add([i for i, _ in batch], [c.page_content for _, c in batch], [c.metadata for _, c in batch])
+            stats["chunks_added"] += len(batch)
+
+        stored_ids = [i for i in ids if i not in duplicate_of]
+        stale_ids = list(old_ids - set(stored_ids))
+        if stale_ids:
+            delete_chunks(stale_ids)
+        backfill(stored_ids)
+
+        manifest.files[filename] = {"sha256": digest, "chunk_ids": stored_ids}
+        if duplicate_of:
+            manifest.files[filename]["duplicate_of"] = duplicate_of
+        stats["files_ingested"] += 1
+        if duplicate_of:
+            stats["chunks_deduplicated"] += len(duplicate_of)
+
+    wanted = set(files) if files is not None else None
+    current = {}
+    for filename in sorted(os.listdir(directory)):
+        if wanted is not None and filename not in wanted:
+            continue
+        if filename.lower().endswith(".pdf") and not filename.startswith("."):
+            path = os.path.join(directory, filename)
+            current[filename] = (path, file_sha256(path))
+
+    for filename in list(manifest.files):
+        if filename not in current:
+            stale_ids = manifest.files.pop(filename)["chunk_ids"]
+            if stale_ids:
+                delete_chunks(stale_ids)
+            stats["files_removed"] += 1
+
+    for filename, (path, digest) in current.items():
+        previous = manifest.files.get(filename)
+        if previous is not None and previous["sha256"] == digest:
+            stats["files_skipped"] += 1
+            backfill(previous["chunk_ids"])
+            continue
+        ingest(filename, path, digest, previous)
+
+    # Duplicates whose kept copy was deleted are ingested again from their own file
+    for filename, entry in list(manifest.files.items()):
+        if deleted & set(entry.get("duplicate_of", {}).values()):
+            path, digest = current[filename]
+            ingest(filename, path, digest, entry)
+
+    manifest.save()
+    for index in side_indexes:
+        index.save()
+    return dict(stats)
@@ -2,11 +2,15 @@ import os
 import pdfplumber
 from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from openai import AzureOpenAI
 from chromadb import PersistentClient
 from chromadb.config import Settings
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from dotenv import load_dotenv
+from registry import get_chat_client, get_embeddings, lazy_module_attrs
+from embedding_pipeline import embed_texts, add_in_batches
+from table_summarizer import TableSummarizer
+from table_classifier import TablePageClassifier
+from chunk_dedup import MinHashIndex
+from pdf_stream import batched, iter_chunks
  
 # Load environment variables
 load_dotenv()
@@ -23,19 +27,31 @@ embedding_endpoint_url = os.environ.get("ADA_AZURE_OPENAI_ENDPOINT")
 embedding_api_key = os.environ.get("ADA_AZURE_OPENAI_API_KEY")
 embedding_deployment_name = os.environ.get("ADA_AZURE_OPENAI_DEPLOYMENT")
 
-client = AzureOpenAI(
-    api_key=api_key,
-    api_version=version_number,
-    azure_endpoint=endpoint_url
-)
+# Shared pooled client from the registry (`client` stays importable from this module)
+__getattr__ = lazy_module_attrs(__name__, {"client": "azure_openai.chat_client"})
  
 # PDF reading and processing
-def extract_text_and_tables(pdf_path):
+def iter_text_and_tables(pdf_path, window=16):
+    """
+    Yield page and table Documents lazily, a window of pages at a time. Tables within a
+    window are summarized together (concurrently, each distinct table once), so memory is
+    bounded by the window rather than the size of the report.
+
+    Tables are only extracted from pages the table pre-classifier picks.
+    """
     documents = []
+    table_slots = []  # (position in documents, page number, raw table)
+    page_texts, extracted, table_pages = [], [], []
     with pdfplumber.open(pdf_path) as pdf:
         for i, page in enumerate(pdf.pages):
             text = page.extract_text() or ""
-            tables = page.extract_tables()
+            page_texts.append(text)
+            tables = []
+            if table_page_classifier.should_extract(text):
+                tables = page.extract_tables()
+                extracted.append(i + 1)
+                if tables:
+                    table_pages.append(i + 1)
             doc_text = f"Page {i+1}:\n{text.strip()}" if text else f"Page {i+1}: No text"
             
             documents.append(Document(
@@ -44,72 +60,92 @@ def extract_text_and_tables(pdf_path):
             ))
             
             for table in tables:
-                table_text = convert_table_to_text(table)
-                documents.append(Document(
-                    page_content=f"Table on page {i+1}:\n{table_text}",
-                    metadata={"source": pdf_path, "page": i + 1}
-                ))
-    return documents
+                table_slots.append((len(documents), i + 1, table))
+                documents.append(None)
+            page.flush_cache()  # Drop the parsed layout once the page is done
  
-def convert_table_to_text(table):
-    prompt = f"Convert this table into a readable paragraph:\n{table}"
-    try:
-        response = client.chat.completions.create(
-            model=deployment_name,
-            messages=[
-                {"role": "system", "content": "You summarize tables into a readable financial description."},
-                {"role": "user", "content": prompt}
-            ]
+            if (i + 1) % window == 0:
+                yield from summarize_table_slots(pdf_path, documents, table_slots)
+                documents, table_slots = [], []
+    yield from summarize_table_slots(pdf_path, documents, table_slots)
+    table_page_classifier.record(page_texts, extracted, table_pages)
+ 
+def summarize_table_slots(pdf_path, documents, table_slots):
+    summaries = table_summarizer.summarize_many([table for _, _, table in table_slots])
+    for (slot, page_number, _), table_text in zip(table_slots, summaries):
+        documents[slot] = Document(
+            page_content=f"Table on page {page_number}:\n{table_text}",
+            metadata={"source": pdf_path, "page": page_number}
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"LLM summarization failed: {e}")
-        return str(table)
+    return documents
+ 
+def summarize_table_text(table_text):
+    prompt = f"Convert this table into a readable paragraph:\n{table_text}"
+    response = get_chat_client().chat.completions.create(
+        model=deployment_name,
+        messages=[
+            {"role": "system", "content": "You summarize tables into a readable financial description."},
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return response.choices[0].message.content.strip()
+ 
+table_summarizer = TableSummarizer(summarize_table_text, namespace="ingest_pdf.summarize_table_text")
+table_page_classifier = TablePageClassifier.from_env()
  
 # Split and embed documents
+splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
+ 
 def chunk_documents(documents):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
     return splitter.split_documents(documents)
  
-def save_to_chroma(docs, persist_directory="chroma_finance_docs"):
+def save_to_chroma(docs, persist_directory="chroma_finance_docs", batch_size=512):
+    """Embed and store chunks; `docs` may be a generator, consumed `batch_size` chunks at a time."""
     print("Starting Chroma embedding...")
  
-    embedding_function = OpenAIEmbeddingFunction(
-        api_key=os.environ.get("ADA_AZURE_OPENAI_API_KEY"),
-        azure_endpoint=os.environ.get("ADA_AZURE_OPENAI_ENDPOINT"),
-        deployment_name=os.environ.get("ADA_AZURE_OPENAI_DEPLOYMENT"),
-        api_version=version_number,
-        model_name="text-embedding-ada-002"  # Ensure this is specified
-    )
+    # Shared cached ADA embedder on the pooled HTTP client (also a Chroma embedding function)
+    embedding_function = get_embeddings()
  
     db = PersistentClient(path=persist_directory, settings=Settings(allow_reset=True))
     collection = db.get_or_create_collection(name="finance_docs", embedding_function=embedding_function)
  
-    for i, doc in enumerate(docs):
-        if doc.page_content.strip():
-            # Filter out LangChain-internal keys like `_type` to prevent Chroma errors
-            cleaned_metadata = {k: v for k, v in doc.metadata.items() if not k.startswith("_")}
-            
-            collection.add(
-                documents=[doc.page_content],
-                metadatas=[cleaned_metadata],
-                ids=[f"doc_{i}"]
-            )
-    print(f"Saved {len(docs)} chunks to ChromaDB at: {persist_directory}")
+    saved = 0
+    for batch in batched(enumerate(docs), batch_size):
+        ids, texts, metadatas = [], [], []
+        for i, doc in batch:
+            if doc.page_content.strip():
+                # Filter out LangChain-internal keys like `_type` to prevent Chroma errors
+                cleaned_metadata = {k: v for k, v in doc.metadata.items() if not k.startswith("_")}
+                ids.append(f"doc_{i}")
+                texts.append(doc.page_content)
+                metadatas.append(cleaned_metadata)
  
-def generate_data_store(pdf_folder="data/pdf_files"):
-    all_documents = []
+        # Embed in token-bounded batches concurrently, then write in large add() calls
+        if texts:
+            vectors = embed_texts(embedding_function, texts)
+            add_in_batches(collection, ids, texts, metadatas, vectors)
+        saved += len(texts)
+    print(f"Saved {saved} chunks to ChromaDB at: {persist_directory}")
+ 
+def iter_raw_documents(pdf_folder):
     for filename in os.listdir(pdf_folder):
         if filename.endswith(".pdf"):
             print(f"Processing {filename}")
             path = os.path.join(pdf_folder, filename)
-            docs = extract_text_and_tables(path)
-            all_documents.extend(docs)
+            yield from iter_text_and_tables(path)
+ 
+def drop_near_duplicates(chunks, dedup_index):
+    """Drop chunks that near-duplicate an earlier one (boilerplate repeated across pages and reports)."""
+    for _, chunk in dedup_index.filter((str(i), chunk) for i, chunk in enumerate(chunks)):
+        yield chunk
  
-    print(f"Loaded {len(all_documents)} raw docs from PDFs.")
-    chunks = chunk_documents(all_documents)
-    print(f"Split into {len(chunks)} chunks.")
+def generate_data_store(pdf_folder="data/pdf_files"):
+    # Pages stream through splitter -> dedup -> embedder -> Chroma without materializing the corpus
+    dedup_index = MinHashIndex(threshold=float(os.environ.get("CHUNK_DEDUP_THRESHOLD", "0.85")))
+    chunks = drop_near_duplicates(iter_chunks(iter_raw_documents(pdf_folder), splitter), dedup_index)
     save_to_chroma(chunks)
+    print(f"Near-duplicate chunks: {dedup_index.stats()}")
+    print(f"Table page pre-classifier: {table_page_classifier.stats()}")
  
 if __name__ == "__main__":
     generate_data_store()
@@ -0,0 +1,93 @@
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordScanner:
+    """
+    Counts whole-word, case-insensitive occurrences of many keywords in a single pass.
+
+    All keywords are compiled into one alternation behind a zero-width lookahead, tried
+    longest-first at each word boundary, so every page is scanned once instead of once
+    per keyword. Different keywords may overlap: a match starting inside another is
+    found at its own position, and a shorter keyword that starts at the same position as
+    a longer one (e.g. "management" inside "management's discussion and analysis") is
+    credited from a precomputed prefix table. A keyword's own occurrences do not overlap
+    ("a a" is found once in "a a a"): each keyword resumes after its previous match, as
+    findall does. Counts match running re.findall(r"\\b<keyword>\\b") per keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._by_lower: Dict[str, List[str]] = {}
+        for kw in self.keywords:
+            self._by_lower.setdefault(kw.lower(), []).append(kw)
+
+        # One group per keyword: the matched group, not the matched text, names the keyword,
+        # as IGNORECASE folding and str.lower() disagree on some characters ("İ")
+        ordered = sorted(self._by_lower, key=len, reverse=True)
+        self._ordered = ordered
+        alternation = "|".join("(" + re.escape(kw) + ")" for kw in ordered)
+        self._pattern = re.compile(r"(?=\b(?:" + alternation + r")\b)", re.IGNORECASE) if ordered else None
+
+        # For each keyword, the shorter keywords that also match wherever it matches
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            kw: tuple(
+                other for other in ordered
+                if len(other) < len(kw) and kw.startswith(other)
+                and _is_word_char(kw[len(other) - 1]) != _is_word_char(kw[len(other)])
+            )
+            for kw in ordered
+        }
+
+    def count_text(self, text: str) -> Counter:
+        """Counts per lowercased keyword for one text."""
+        counts = Counter()
+        if self._pattern is None:
+            return counts
+        resume_at: Dict[str, int] = {}  # per keyword, where its next match may start
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            kw = self._ordered[match.lastindex - 1]
+            for found in (kw, *self._prefixes[kw]):
+                if start >= resume_at.get(found, 0):
+                    counts[found] += 1
+                    resume_at[found] = start + len(found)
+        return counts
+
+    def count_many(self, texts: Iterable[str], max_workers: Optional[int] = None, pages_per_task: int = 32) -> Dict[str, int]:
+        """
+        Total counts over many texts, keyed by the keywords as given (zero for no match).
+        With max_workers > 1, pages are scanned in parallel worker processes.
+        """
+        total = Counter()
+        if max_workers and max_workers > 1:
+            texts = list(texts)
+            batches = [texts[i:i + pages_per_task] for i in range(0, len(texts), pages_per_task)]
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for counts in pool.map(_count_batch, [self.keywords] * len(batches), batches):
+                    total.update(counts)
+        else:
+            for text in texts:
+                total.update(self.count_text(text))
+        return {kw: total[kw.lower()] for kw in self.keywords}
+
+
+@lru_cache(maxsize=64)
+def get_scanner(keywords: Tuple[str, ...]) -> KeywordScanner:
+    """Compiled scanner for a keyword set, built once per process and reused."""
+    return KeywordScanner(keywords)
+
+
+def _count_batch(keywords: List[str], texts: List[str]) -> Counter:
+    scanner = get_scanner(tuple(keywords))
+    total = Counter()
+    for text in texts:
+        total.update(scanner.count_text(text))
+    return total
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+CACHE_PATH = "llm_responses.sqlite"
+
+# Request parameters that make a reply non-reproducible or not a single text reply
+_UNCACHEABLE = ("stream", "n", "logprobs", "tools")
+
+
+class ResponseCache:
+    """
+    On-disk cache of chat completion replies.
+
+    Replies are keyed by (model, deployment, temperature, SHA-256 of the full messages
+    and any other request parameters), so the same prompt to the same deployment is
+    answered from SQLite instead of the LLM. Entries expire after `ttl_seconds` and the
+    store is bounded to `max_entries`: once exceeded, the least recently used replies
+    are evicted down to 95% of it.
+
+    Requests that cannot be replayed (streaming, n > 1, tool calls) always bypass the
+    cache, and so by default (`deterministic_only`) does anything sampled at a
+    temperature other than 0, including the API default when none is given. Callers
+    can also bypass explicitly (e.g. an analyst asking to regenerate).
+    Setting LLM_CACHE=off in the environment disables it process-wide.
+    """
+
+    def __init__(
+        self,
+        cache_path: str = CACHE_PATH,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        max_entries: int = 50_000,
+        deterministic_only: bool = True,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.deterministic_only = deterministic_only
+        self.enabled = os.environ.get("LLM_CACHE", "on").lower() not in ("0", "off", "false", "no")
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+        # Row count kept incrementally; re-read only when eviction is due (other processes may share the file)
+        (self._count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+
+    @staticmethod
+    def key(model: str, deployment: Optional[str], temperature: Optional[float], messages: List[Dict[str, Any]], **params) -> str:
+        payload = json.dumps({"messages": messages, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+        message_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{model}\0{deployment}\0{temperature}\0{message_hash}".encode("utf-8")).hexdigest()
+
+    def should_bypass(self, temperature: Optional[float] = None, **params) -> bool:
+        if not self.enabled:
+            return True
+        if any(params.get(p) not in (None, False, 1) for p in _UNCACHEABLE):
+            return True
+        return self.deterministic_only and temperature not in (0, 0.0)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT content, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._count -= self._db.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+                self._db.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, content: str):
+        now = time.time()
+        with self._lock:
+            inserted = self._db.execute("INSERT OR IGNORE INTO responses VALUES (?, ?, ?, ?)", (key, content, now, now)).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                self._db.execute(
+                    "UPDATE responses SET content = ?, created = ?, last_used = ? WHERE key = ?", (content, now, now, key),
+                )
+            if self._count > self.max_entries:
+                (self._count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+                if self._count > self.max_entries:
+                    evict = self._count - int(self.max_entries * 0.95)
+                    self._db.execute(
+                        "DELETE FROM responses WHERE rowid IN "
+                        "(SELECT rowid FROM responses ORDER BY last_used LIMIT ?)",
+                        (evict,),
+                    )
+                    self._count -= evict
+            self._db.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "bypassed": self.bypassed,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def cached_completion(
+    client,
+    messages: List[Dict[str, Any]],
+    model: str,
+    cache: Optional[ResponseCache] = None,
+    deployment: Optional[str] = None,
+    use_cache: bool = True,
+    **params,
+) -> str:
+    """
+    Run client.chat.completions.create and return the reply text, served from `cache`
+    when the same request was answered before.
+
+    Args:
+      client: Azure OpenAI / OpenAI client.
+      messages: Chat messages.
+      model: Model name sent with the request.
+      cache: Response cache; None calls the LLM directly.
+      deployment: Azure deployment, part of the cache key.
+      use_cache: False forces a fresh reply (it still refreshes the cached one).
+      **params: Other request parameters (temperature, ...).
+    """
+    temperature = params.get("temperature")
+    key_params = {k: v for k, v in params.items() if k != "temperature"}
+    key = None
+    if cache is not None:
+        if not use_cache or cache.should_bypass(**params):
+            cache.record_bypass()
+        else:
+            key = cache.key(model, deployment, temperature, messages, **key_params)
+            content = cache.get(key)
+            if content is not None:
+                return content
+
+    completion = client.chat.completions.create(messages=messages, model=model, **params)
+    content = completion.choices[0].message.content
+
+    if cache is not None and content is not None and not cache.should_bypass(**params):
+        cache.put(key or cache.key(model, deployment, temperature, messages, **key_params), content)
+    return content
@@ -0,0 +1,118 @@
+import time
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from llm_cache import ResponseCache
+
+_DONE = object()
+
+
+class CompletionStream:
+    """
+    A chat completion streamed as text deltas.
+
+    Iterate it (sync) or `async for` over it to receive chunks as they arrive; afterwards
+    `text` holds the full reply. `time_to_first_token` and `total_seconds` are measured
+    from the request. A reply already in `cache` is replayed at once as a single chunk,
+    and a streamed reply is stored there when it completes, under the same key as a
+    blocking cached_completion() call with the same arguments.
+    """
+
+    def __init__(
+        self,
+        client,
+        messages: List[Dict[str, Any]],
+        model: str,
+        cache: Optional[ResponseCache] = None,
+        deployment: Optional[str] = None,
+        use_cache: bool = True,
+        **params,
+    ):
+        self.client = client
+        self.messages = messages
+        self.model = model
+        self.cache = cache
+        self.use_cache = use_cache
+        self.params = params
+        self.text = ""
+        self.time_to_first_token: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self.from_cache = False
+        self._consumed = False
+        key_params = {k: v for k, v in params.items() if k != "temperature"}
+        self._key = cache.key(model, deployment, params.get("temperature"), messages, **key_params) if cache is not None else None
+
+    def _deltas(self) -> Iterator[str]:
+        if self.cache is not None:
+            if not self.use_cache or self.cache.should_bypass(**self.params):
+                self.cache.record_bypass()
+            else:
+                cached = self.cache.get(self._key)
+                if cached is not None:
+                    self.from_cache = True
+                    yield cached
+                    return
+        response = self.client.chat.completions.create(messages=self.messages, model=self.model, stream=True, **self.params)
+        for event in response:
+            # Azure sends a first event with only content-filter results and no choices
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+
+    def __iter__(self) -> Iterator[str]:
+        if self._consumed:
+            raise RuntimeError("A CompletionStream can only be iterated once; use .text for the result.")
+        self._consumed = True
+        parts = []
+        start = time.perf_counter()
+        for delta in self._deltas():
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - start
+            parts.append(delta)
+            yield delta
+        self.text = "".join(parts)
+        self.total_seconds = time.perf_counter() - start
+        if self.cache is not None and not self.from_cache and self.text and not self.cache.should_bypass(**self.params):
+            self.cache.put(self._key, self.text)
+
+    def sections(self) -> Iterator[str]:
+        """Yield whole paragraphs/sections (split on blank lines) instead of raw tokens."""
+        buffer = ""
+        for delta in self:
+            buffer += delta
+            while "\n\n" in buffer:
+                section, buffer = buffer.split("\n\n", 1)
+                if section.strip():
+                    yield section
+        if buffer.strip():
+            yield buffer
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        """Async iteration: the blocking stream is drained on a worker thread."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def pump():
+            try:
+                for delta in self:
+                    loop.call_soon_threadsafe(queue.put_nowait, delta)
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+
+        threading.Thread(target=pump, daemon=True).start()
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def stats(self) -> dict:
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_seconds": self.total_seconds,
+            "chars": len(self.text),
+            "from_cache": self.from_cache,
+        }
@@ -0,0 +1,58 @@
+import os
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Union
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+
+def pdf_paths(source: Union[str, Iterable[str]]) -> List[str]:
+    """Expand a PDF path, a directory of PDFs, or a list of paths into PDF file paths."""
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            return [
+                os.path.join(source, name) for name in sorted(os.listdir(source))
+                if name.lower().endswith(".pdf") and not name.startswith(".")
+            ]
+        return [source]
+    return list(source)
+
+
+def iter_pdf_pages(source: Union[str, Iterable[str]], cache=None) -> Iterator["Document"]:
+    """
+    Yield one Document per PDF page, opening files one at a time and parsing each page
+    only when it is requested. Nothing is accumulated, so memory stays flat regardless
+    of how many or how large the reports are.
+
+    Pages are read through the parse-once document cache (the process-wide one unless
+    `cache` is given), so a file already parsed by another stage is not parsed again.
+    Pass cache=False to always parse with PyPDFLoader.
+    """
+    if cache is False:
+        from langchain_community.document_loaders import PyPDFLoader
+        for path in pdf_paths(source):
+            yield from PyPDFLoader(path).lazy_load()
+        return
+
+    if cache is None:
+        from registry import get_document_cache
+        cache = get_document_cache()
+    for path in pdf_paths(source):
+        yield from cache.iter_pages(path)
+
+
+def iter_chunks(pages: Iterable["Document"], text_splitter) -> Iterator["Document"]:
+    """Split pages into chunks as they arrive (pages are split independently, as split_documents does)."""
+    for page in pages:
+        yield from text_splitter.split_documents([page])
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to `size` items from an iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
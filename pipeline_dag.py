@@ -0,0 +1,94 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class Stage:
+    """
+    One node of the pipeline: `fn` is called with the results of `deps` as keyword
+    arguments (plus any matching pipeline inputs) once all of them have finished.
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Iterable[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+
+
+class PipelineDAG:
+    """
+    Runs stages as soon as their dependencies are done, independent stages concurrently
+    on a thread pool (the agents are network-bound), so a join stage waits for the
+    slowest branch rather than the sum of all of them.
+
+    Per-stage wall-clock seconds are kept in `timings` (with "total" for the whole run).
+    """
+
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+        self.max_workers = max_workers or len(stages)
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _run_stage(self, stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return stage.fn(**kwargs)
+        finally:
+            with self._lock:
+                self.timings[stage.name] = time.perf_counter() - start
+
+    def run(self, inputs: Optional[Dict[str, Any]] = None, targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Run the stages needed for `targets` (default: all) and return {stage name: result}.
+
+        `inputs` are passed to any stage whose function or dependencies name them, e.g.
+        {"input_data": ...}. Results already given in `inputs` under a stage's name are
+        reused instead of re-running that stage. The first stage error is re-raised.
+        """
+        inputs = dict(inputs or {})
+        needed = self._needed(targets or self.stages)
+        results = {name: inputs[name] for name in needed if name in inputs}
+        pending = [name for name in needed if name not in results]
+        self.timings = {}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                for name in [n for n in pending if all(dep in results for dep in self.stages[n].deps)]:
+                    pending.remove(name)
+                    stage = self.stages[name]
+                    kwargs = {dep: results[dep] for dep in stage.deps}
+                    kwargs.update({k: v for k, v in inputs.items() if k in _params(stage.fn) and k not in kwargs})
+                    running[pool.submit(self._run_stage, stage, kwargs)] = name
+                if not running:
+                    raise ValueError(f"Pipeline has a dependency cycle among: {pending}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        self.timings["total"] = time.perf_counter() - start
+        return results
+
+    def _needed(self, targets: Iterable[str]) -> List[str]:
+        needed, stack = [], list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.append(name)
+                stack.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+
+    def format_timings(self) -> str:
+        return ", ".join(f"{name}: {seconds:.2f}s" for name, seconds in self.timings.items())
+
+
+def _params(fn: Callable) -> tuple:
+    code = getattr(fn, "__code__", None)
+    return code.co_varnames[:code.co_argcount + code.co_kwonlyargcount] if code else ()
@@ -0,0 +1,253 @@
+import os
+import threading
+from typing import Any, Callable, Dict
+
+from dotenv import load_dotenv
+
+load_dotenv()  # Load env variables from .env file
+
+# -----------------------------
+# Lazy object registry
+# -----------------------------
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def register(name: str, factory: Callable[[], Any]):
+    """Register a zero-argument factory; the object is built on the first get(name)."""
+    with _lock:
+        _factories[name] = factory
+
+
+def get(name: str) -> Any:
+    """Return the shared instance for `name`, creating it on first use (thread-safe)."""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            if name not in _factories:
+                raise KeyError(f"Nothing registered under '{name}'.")
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+def is_created(name: str) -> bool:
+    return name in _instances
+
+
+def reset(name: str = None):
+    """Drop one (or every) created instance so the next get() rebuilds it."""
+    with _lock:
+        if name is None:
+            _instances.clear()
+        else:
+            _instances.pop(name, None)
+
+
+def lazy_module_attrs(module_name: str, attrs: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    Build a module-level __getattr__ (PEP 562) exposing registry entries as module
+    attributes, so `from module import client` keeps working without import-time setup.
+    """
+    def __getattr__(attr: str) -> Any:
+        if attr in attrs:
+            return get(attrs[attr])
+        raise AttributeError(f"module '{module_name}' has no attribute '{attr}'")
+    return __getattr__
+
+
+# -----------------------------
+# Pooled HTTP transport
+# -----------------------------
+class ConnectionStats:
+    """
+    Request and connection counters for the shared HTTP pools. Requests that did not
+    open a new TCP connection reused a keep-alive one (no TCP/TLS handshake).
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            self._count("connections")
+        elif event_name == "connection.start_tls.complete":
+            self._count("tls_handshakes")
+
+    async def atrace(self, event_name: str, info: dict):
+        self.trace(event_name, info)
+
+    def on_request(self, request):
+        self._count("requests")
+        request.extensions["trace"] = self.trace
+
+    async def on_async_request(self, request):
+        self._count("requests")
+        request.extensions["trace"] = self.atrace
+
+    def as_dict(self) -> dict:
+        reused = max(self.requests - self.connections, 0)
+        return {
+            "requests": self.requests, "connections": self.connections, "tls_handshakes": self.tls_handshakes,
+            "reused": reused, "reuse_rate": reused / self.requests if self.requests else 0.0,
+        }
+
+
+connection_stats = ConnectionStats()
+
+
+def _http_settings() -> dict:
+    """Pool, timeout and retry settings, overridable through the environment."""
+    import httpx
+    return {
+        "limits": httpx.Limits(
+            max_connections=int(os.environ.get("AZURE_OPENAI_MAX_CONNECTIONS", 32)),
+            max_keepalive_connections=int(os.environ.get("AZURE_OPENAI_MAX_KEEPALIVE", 16)),
+            keepalive_expiry=float(os.environ.get("AZURE_OPENAI_KEEPALIVE_SECONDS", 90)),
+        ),
+        "timeout": httpx.Timeout(
+            float(os.environ.get("AZURE_OPENAI_TIMEOUT_SECONDS", 120)),
+            connect=float(os.environ.get("AZURE_OPENAI_CONNECT_TIMEOUT_SECONDS", 10)),
+        ),
+        "max_retries": int(os.environ.get("AZURE_OPENAI_MAX_RETRIES", 3)),
+    }
+
+
+def _make_http_client():
+    import httpx
+    settings = _http_settings()
+    return httpx.Client(
+        limits=settings["limits"], timeout=settings["timeout"],
+        event_hooks={"request": [connection_stats.on_request]},
+    )
+
+
+def _make_async_http_client():
+    # An httpx.AsyncClient belongs to the event loop that first uses it; call
+    # reset("http.async_client") before reusing it from a new loop.
+    import httpx
+    settings = _http_settings()
+    return httpx.AsyncClient(
+        limits=settings["limits"], timeout=settings["timeout"],
+        event_hooks={"request": [connection_stats.on_async_request]},
+    )
+
+
+# -----------------------------
+# Shared Azure OpenAI factories
+# -----------------------------
+def _azure_chat_params() -> dict:
+    settings = _http_settings()
+    return {
+        "azure_endpoint": os.environ.get("AZURE_OPENAI_ENDPOINT"),
+        "azure_deployment": os.environ.get("AZURE_OPENAI_DEPLOYMENT"),
+        "api_key": os.environ.get("AZURE_OPENAI_API_KEY"),
+        "api_version": os.environ.get("API_VERSION_GA"),
+        "timeout": settings["timeout"],
+        "max_retries": settings["max_retries"],
+    }
+
+
+def _make_chat_client():
+    from openai import AzureOpenAI
+    return AzureOpenAI(http_client=get("http.client"), **_azure_chat_params())
+
+
+def _make_async_chat_client():
+    from openai import AsyncAzureOpenAI
+    return AsyncAzureOpenAI(http_client=get("http.async_client"), **_azure_chat_params())
+
+
+def _make_embeddings():
+    from langchain_openai import AzureOpenAIEmbeddings
+    from embedding_cache import CachedEmbeddings
+    settings = _http_settings()
+    embedding_model_name = os.environ.get("ADA_AZURE_OPENAI_MODEL_NAME")
+    return CachedEmbeddings(AzureOpenAIEmbeddings(
+        model=embedding_model_name,
+        api_key=os.environ.get("ADA_AZURE_OPENAI_API_KEY"),
+        azure_deployment=os.environ.get("ADA_AZURE_OPENAI_DEPLOYMENT"),
+        azure_endpoint=os.environ.get("ADA_AZURE_OPENAI_ENDPOINT"),
+        api_version="2024-10-21",
+        http_client=get("http.client"),
+        http_async_client=get("http.async_client"),
+        timeout=settings["timeout"],
+        max_retries=settings["max_retries"],
+    ), model=embedding_model_name)
+
+
+def make_agno_model():
+    """A fresh agno Azure model; agents each get their own, all on the shared clients."""
+    from agno.models.azure import AzureOpenAI as AOI
+    return AOI(
+        id=os.environ.get("AZURE_OPENAI_MODEL_NAME"),
+        api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
+        azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
+        azure_deployment=os.environ.get("AZURE_OPENAI_DEPLOYMENT"),
+        client=get_chat_client(),
+        async_client=get_async_chat_client(),
+    )
+
+
+def _make_response_cache():
+    from llm_cache import ResponseCache
+    return ResponseCache(
+        ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+        max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 50_000)),
+        # Sampled replies (temperature != 0) are only replayed when explicitly allowed
+        deterministic_only=os.environ.get("LLM_CACHE_SAMPLED", "off").lower() not in ("1", "on", "true", "yes"),
+    )
+
+
+def _make_document_cache():
+    from document_cache import DocumentCache, CACHE_DIR
+    return DocumentCache(os.environ.get("PDF_PARSE_CACHE_DIR", CACHE_DIR))
+
+
+register("http.client", _make_http_client)
+register("http.async_client", _make_async_http_client)
+register("azure_openai.chat_client", _make_chat_client)
+register("azure_openai.async_chat_client", _make_async_chat_client)
+register("azure_openai.embeddings", _make_embeddings)
+register("llm.response_cache", _make_response_cache)
+register("pdf.document_cache", _make_document_cache)
+
+
+def get_chat_client():
+    """Process-wide Azure OpenAI chat client."""
+    return get("azure_openai.chat_client")
+
+
+def get_async_chat_client():
+    """Process-wide async Azure OpenAI chat client."""
+    return get("azure_openai.async_chat_client")
+
+
+def get_embeddings():
+    """Process-wide cached Azure OpenAI (ADA) embedder."""
+    return get("azure_openai.embeddings")
+
+
+def get_response_cache():
+    """Process-wide on-disk LLM response cache."""
+    return get("llm.response_cache")
+
+
+def get_document_cache():
+    """Process-wide parse-once PDF cache."""
+    return get("pdf.document_cache")
+
+
+def get_connection_stats() -> dict:
+    """Request / new-connection / TLS-handshake counts and the keep-alive reuse rate."""
+    return connection_stats.as_dict()
@@ -0,0 +1,84 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from chroma_adapter import query_by_vectors, relevance_score_fn
+from embedding_cache import normalize_text
+
+
+class RetrieverService:
+    """
+    Long-lived query-time handle on a LangChain Chroma store.
+
+    The collection stays open for the life of the process and query embeddings are
+    kept in an in-memory LRU (in front of any on-disk embedding cache), so a repeated
+    query costs one local vector search. query_many() embeds all uncached queries in a
+    single request and searches them in one Chroma call.
+
+    Scores are relevance scores as returned by similarity_search_with_relevance_scores.
+    """
+
+    def __init__(self, vectorstore, embeddings, max_cached_queries: int = 4096):
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.max_cached_queries = max_cached_queries
+        self.hits = 0
+        self.misses = 0
+        self.searches = 0
+        self.search_seconds = 0.0
+        self._vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._relevance = relevance_score_fn(vectorstore)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Query vectors, embedding only the ones not in the LRU (in one batch request)."""
+        keys = [normalize_text(q) for q in queries]
+        vectors, missing = {}, {}
+        with self._lock:
+            for key, query in zip(keys, queries):
+                if key in self._vectors:
+                    self._vectors.move_to_end(key)
+                    vectors[key] = self._vectors[key]
+                    self.hits += 1
+                elif key not in missing:
+                    missing[key] = query
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        if missing:
+            fresh = self.embeddings.embed_documents(list(missing.values()))
+            with self._lock:
+                for key, vector in zip(missing, fresh):
+                    vectors[key] = vector
+                    self._vectors[key] = vector
+                while len(self._vectors) > self.max_cached_queries:
+                    self._vectors.popitem(last=False)
+        return [vectors[key] for key in keys]
+
+    def query_many(self, queries: List[str], k: int = 3, where: Optional[dict] = None) -> List[List[Tuple["Document", float]]]:
+        """
+        Top-k (Document, relevance score) pairs for each query, in query order.
+        `where` is an optional Chroma metadata filter applied to every query.
+        """
+        if not queries:
+            return []
+        vectors = self.embed_queries(queries)
+        start = time.perf_counter()
+        hits = query_by_vectors(self.vectorstore, vectors, k=k, where=where, require_ids=False)
+        with self._lock:
+            self.searches += len(queries)
+            self.search_seconds += time.perf_counter() - start
+        return [[(document, self._relevance(distance)) for _, document, distance in ranked] for ranked in hits]
+
+    def search(self, query: str, k: int = 3, where: Optional[dict] = None) -> List[Tuple["Document", float]]:
+        return self.query_many([query], k=k, where=where)[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "query_cache_hits": self.hits,
+            "query_cache_misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_search_ms": 1000 * self.search_seconds / self.searches if self.searches else 0.0,
+        }
@@ -1,9 +1,10 @@
 import os
-import requests
 import pandas as pd
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from sklearn.preprocessing import MinMaxScaler
+from batch_scoring import score_application
+from financials_store import get_store
+from ticker_resolver import resolve_ticker
 from typing import Tuple, Dict, Optional, Any, Union
 from langchain.tools import tool
  
@@ -23,21 +24,8 @@ class ScoreStructure(BaseModel):
 @tool
 def search_ticker_by_company_name(company_name: str) -> Optional[str]:
     """Search for a company's stock ticker using Yahoo Finance."""
-    url = f"https://query1.finance.yahoo.com/v1/finance/search?q={company_name}"
-    headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        results = response.json().get("quotes", [])
-        for result in results:
-            symbol = result.get("symbol", "")
-            if symbol.endswith(".NS"):
-                return symbol
-            elif symbol.endswith(".BO"):
-                return symbol[:-3] + ".NS"
-            else:
-                return symbol + ".NS"
-        return None
+        return resolve_ticker(company_name)
     except Exception as e:
         print(f"Error searching for ticker: {e}")
         return None
@@ -59,15 +47,10 @@ def fetch_financial_data_from_excel(
 ) -> Optional[Dict[str, Any]]:
     """Fetch the financial data of a company from an Excel sheet using its ticker."""
     try:
-        df = pd.read_excel("Company_Financials_FY2024.xlsx")
-        if "Company" not in df.columns:
-            print("Excel file must have a 'Company' column.")
-            return None
-        row = df[df['Company'] == ticker]
-        if row.empty:
+        row = get_store().get(ticker)
+        if row is None:
             print(f"Ticker {ticker} not found in Excel.")
             return None
-        row = row.iloc[0]
         data = {
             "Net Profit Margin %": row.get("Net Profit Margin %"),
             "Return on Equity %": row.get("Return on Equity %"),
@@ -91,51 +74,7 @@ def fetch_financial_data_from_excel(
 def rule_function(data: Dict[str, Any]) -> Tuple[float, float]:
     """Apply rule-based scoring logic to calculate risk scores based on financial data."""
     try:
-        df1 = pd.read_excel("Company_Financials_Synthetic_First100.xlsx")
-        df2 = pd.DataFrame([data])
-        df = pd.concat([df1, df2], axis=0)
- 
-        df = df[[
-            "Net Profit Margin %", "Return on Equity %", "Return on Assets %",
-            "Current Ratio", "Asset Turnover Ratio", "Debt Equity Ratio", "Debt To Asset Ratio",
-            "Interest Coverage Ratio", "Loan Value", "Collateral Value", "Credit Score"
-        ]]
-        df["LtC"] = df.apply(lambda row: safe_div(row["Loan Value"], row["Collateral Value"]), axis=1)
-        df = df.drop(columns=["Loan Value", "Collateral Value"])
-        df = df.fillna(df.median(numeric_only=True))
- 
-        scaler = MinMaxScaler()
-        scaled_data = scaler.fit_transform(df)
-        scaled_df = pd.DataFrame(scaled_data, columns=df.columns)
-        scaled_df = 1 + (100 * scaled_df)
- 
-        dict_fin_weights = {
-            "Net Profit Margin %": 0.25, 
-            "Return on Equity %": 0.25, 
-            "Return on Assets %": 0.25,
-            "Current Ratio": 0.25, 
-            "Asset Turnover Ratio": 0.1, 
-            "Debt Equity Ratio": 0.1, 
-            "Debt To Asset Ratio": -0.2
-        }
-        dict_repay_weights = {
-            "Interest Coverage Ratio": 0.20, 
-            "Credit Score": 0.65, 
-            "LtC": 0.15
-        }
- 
-        for col, weight in {**dict_fin_weights, **dict_repay_weights}.items():
-            scaled_df[col] = scaled_df[col] * weight
- 
-        scaled_df["Financial Risk Score"] = 100 - scaled_df[list(dict_fin_weights.keys())].sum(axis=1)
-        scaled_df["Repayment Risk Score"] = 100 - scaled_df[list(dict_repay_weights.keys())].sum(axis=1)
-        scaled_df["Final Risk Score"] = (
-            scaled_df["Financial Risk Score"] * 0.3 +
-            scaled_df["Repayment Risk Score"] * 0.7
-        )
- 
-        scaled_df.to_csv("scaled_data.csv", index=False)
-        return scaled_df.iloc[-1]["Final Risk Score"], df.iloc[-1]["LtC"]
+        return score_application(data)
     except Exception as e:
         print(f"Error in risk calculation: {e}")
         return 0.0, 0.0
@@ -0,0 +1,101 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from batch_scoring import (
+    BASELINE_PATH,
+    FEATURE_COLUMNS,
+    ReferenceStats,
+    dict_fin_weights,
+    dict_repay_weights,
+)
+from file_hash import file_sha256
+
+# Compiled scoring profile built from the baseline workbook
+PROFILE_PATH = "scoring_profile.npz"
+
+
+# -----------------------------
+# Helper Functions
+# -----------------------------
+def _profile_hash(reference: ReferenceStats) -> str:
+    """Content hash over the statistics and weights, so two profiles can be compared cheaply."""
+    digest = hashlib.sha256()
+    for arr in (reference.ref_min, reference.ref_max, reference.ref_median):
+        digest.update(np.ascontiguousarray(arr, dtype=np.float64).tobytes())
+    digest.update(json.dumps([reference.fin_weights, reference.repay_weights], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+# -----------------------------
+# Build / Load
+# -----------------------------
+def build_profile(source_path: str = BASELINE_PATH, profile_path: str = PROFILE_PATH) -> ReferenceStats:
+    """
+    Compute per-column min, max and median from the baseline workbook and persist them,
+    together with the scoring weights, as a compact .npz artifact.
+
+    Args:
+      source_path (str): Baseline spreadsheet.
+      profile_path (str): Where to write the profile.
+
+    Returns:
+      ReferenceStats: The freshly built profile.
+    """
+    reference = ReferenceStats.from_frame(pd.read_excel(source_path))
+    reference.fin_weights = dict(dict_fin_weights)
+    reference.repay_weights = dict(dict_repay_weights)
+    reference.profile_hash = _profile_hash(reference)
+
+    tmp_path = profile_path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        columns=np.array(FEATURE_COLUMNS),
+        ref_min=reference.ref_min,
+        ref_max=reference.ref_max,
+        ref_median=reference.ref_median,
+        fin_weights=np.array(json.dumps(reference.fin_weights)),
+        repay_weights=np.array(json.dumps(reference.repay_weights)),
+        source_hash=np.array(file_sha256(source_path)),
+        profile_hash=np.array(reference.profile_hash),
+    )
+    os.replace(tmp_path, profile_path)
+    print(f"Built scoring profile {reference.profile_hash[:12]} from {source_path} -> {profile_path}")
+    return reference
+
+
+def read_profile(profile_path: str = PROFILE_PATH):
+    """Read a persisted profile. Returns (ReferenceStats, source_hash)."""
+    with np.load(profile_path, allow_pickle=False) as npz:
+        if list(npz["columns"]) != FEATURE_COLUMNS:
+            raise ValueError(f"Scoring profile {profile_path} was built for different feature columns.")
+        reference = ReferenceStats(npz["ref_min"], npz["ref_max"], npz["ref_median"])
+        reference.fin_weights = json.loads(str(npz["fin_weights"]))
+        reference.repay_weights = json.loads(str(npz["repay_weights"]))
+        reference.profile_hash = str(npz["profile_hash"])
+        return reference, str(npz["source_hash"])
+
+
+def load_profile(source_path: str = BASELINE_PATH, profile_path: str = PROFILE_PATH) -> ReferenceStats:
+    """
+    Load the scoring profile, rebuilding it only when the source spreadsheet's content
+    hash differs from the one recorded in the artifact (or the artifact is missing).
+    If the spreadsheet itself is absent, an existing profile is used as-is.
+    """
+    if os.path.exists(profile_path):
+        try:
+            reference, source_hash = read_profile(profile_path)
+            if not os.path.exists(source_path) or file_sha256(source_path) == source_hash:
+                return reference
+            print(f"{source_path} changed since the scoring profile was built; rebuilding...")
+        except (ValueError, KeyError, OSError) as e:
+            print(f"Ignoring unreadable scoring profile {profile_path}: {e}")
+    return build_profile(source_path, profile_path)
+
+
+if __name__ == "__main__":
+    profile = build_profile()
+    for col, lo, hi, med in zip(FEATURE_COLUMNS, profile.ref_min, profile.ref_max, profile.ref_median):
+        print(f"{col:<25} min={lo:<12.4g} max={hi:<12.4g} median={med:.4g}")
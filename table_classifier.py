@@ -0,0 +1,148 @@
+import os
+import random
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from document_cache import figure_count
+
+DEFAULT_THRESHOLD = 0.35
+
+
+def table_page_score(text: str) -> float:
+    """
+    "Tableness" of a page in [0, 1] from its extracted text alone:
+      - share of lines that read like table rows (mostly figures),
+      - digit density,
+      - longest run of row lines with a consistent figure count (aligned columns).
+    Prose pages that mention years or amounts score low; statements score high.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return 0.0
+    counts = [figure_count(line) for line in lines]
+    row_share = sum(1 for c in counts if c) / len(lines)
+    visible = [ch for ch in text if not ch.isspace()]
+    digit_density = sum(ch.isdigit() for ch in visible) / len(visible)
+
+    run = best = 0
+    previous = None
+    for count in counts:
+        if count:
+            run = run + 1 if previous is not None and abs(count - previous) <= 1 else 1
+            previous = count
+        else:
+            run, previous = 0, None
+        best = max(best, run)
+
+    score = 0.4 * min(1.0, row_share * 2) + 0.3 * min(1.0, digit_density * 5) + 0.3 * min(1.0, best / 4)
+    return round(score, 3)
+
+
+class TablePageClassifier:
+    """
+    Cheap pre-pass deciding which pages are worth handing to Camelot / pdfplumber.
+
+    Pages scoring at least `threshold` are candidates. A random `audit_rate` share of
+    the other pages is extracted as well, so missed tables can be counted: precision is
+    measured on the candidates, recall estimated from the audited pages. With
+    audit_rate=1 every page is extracted and threshold_report() gives exact
+    precision/recall for other thresholds, for tuning.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, audit_rate: float = 0.0, seed: int = 0):
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self._rng = random.Random(seed)
+        self.pages = 0
+        self.candidates = 0
+        self.true_positives = 0
+        self.false_positives = 0
+        self.audited = 0
+        self.missed = 0
+        self.samples: List[tuple] = []  # (score, has_table) for every extracted page
+
+    @classmethod
+    def from_env(cls) -> "TablePageClassifier":
+        return cls(
+            threshold=float(os.environ.get("TABLE_PAGE_THRESHOLD", DEFAULT_THRESHOLD)),
+            audit_rate=float(os.environ.get("TABLE_PAGE_AUDIT_RATE", 0.0)),
+        )
+
+    def should_extract(self, text: str) -> bool:
+        """Whether a page is a candidate, or drawn for the audit sample."""
+        return table_page_score(text) >= self.threshold or self._rng.random() < self.audit_rate
+
+    def select_pages(self, texts: Sequence[str]) -> List[int]:
+        """1-based pages to extract tables from: the candidates plus the audit sample."""
+        return [page for page, text in enumerate(texts, 1) if self.should_extract(text)]
+
+    def record(self, texts: Sequence[str], extracted_pages: Iterable[int], table_pages: Iterable[int]):
+        """Count the outcome of one document: which pages were extracted and which had tables."""
+        extracted, with_tables = set(extracted_pages), set(table_pages)
+        self.pages += len(texts)
+        for page in sorted(extracted):
+            score = table_page_score(texts[page - 1])
+            has_table = page in with_tables
+            self.samples.append((score, has_table))
+            if score >= self.threshold:
+                self.candidates += 1
+                if has_table:
+                    self.true_positives += 1
+                else:
+                    self.false_positives += 1
+            else:
+                self.audited += 1
+                self.missed += has_table
+
+    def stats(self) -> Dict:
+        recall = None
+        if self.audited and self.audit_rate:
+            estimated_missed = self.missed / self.audit_rate
+            found = self.true_positives + estimated_missed
+            recall = self.true_positives / found if found else 1.0
+        return {
+            "pages": self.pages,
+            "candidates": self.candidates,
+            "skipped": self.pages - self.candidates - self.audited,
+            "precision": self.true_positives / self.candidates if self.candidates else None,
+            "recall_estimate": recall,
+            "audited": self.audited,
+            "missed_in_audit": self.missed,
+        }
+
+    def threshold_report(self, thresholds: Optional[Iterable[float]] = None) -> List[Dict]:
+        """Precision/recall/share-of-pages-extracted per threshold over the extracted pages."""
+        thresholds = thresholds if thresholds is not None else [t / 20 for t in range(1, 16)]
+        total_tables = sum(1 for _, has_table in self.samples if has_table)
+        report = []
+        for threshold in thresholds:
+            picked = [has_table for score, has_table in self.samples if score >= threshold]
+            hits = sum(picked)
+            report.append({
+                "threshold": threshold,
+                "precision": hits / len(picked) if picked else None,
+                "recall": hits / total_tables if total_tables else None,
+                "extracted_share": len(picked) / len(self.samples) if self.samples else None,
+            })
+        return report
+
+
+if __name__ == "__main__":
+    # Tune the threshold: extract every page of a directory once and sweep thresholds
+    import sys
+    from pdf_stream import pdf_paths
+    from registry import get_document_cache
+    from table_extraction import extract_tables_parallel
+
+    cache = get_document_cache()
+    paths = pdf_paths(sys.argv[1] if len(sys.argv) > 1 else "data/pdf_files")
+    extract_tables_parallel(paths, pages={path: range(1, cache.get(path).page_count + 1) for path in paths})
+    classifier = TablePageClassifier(audit_rate=1.0)
+    for path in paths:
+        parsed = cache.get(path)
+        classifier.record(
+            [page["text"] for page in parsed.pages],
+            range(1, parsed.page_count + 1),
+            [page for page, _, _ in parsed.tables or []],
+        )
+    for row in classifier.threshold_report():
+        print(row)
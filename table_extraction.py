@@ -0,0 +1,179 @@
+import os
+import time
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def page_spec(pages: Sequence[int]) -> str:
+    """Camelot page string for sorted page numbers, with consecutive runs as ranges: "1-4,7,9-10"."""
+    runs = []
+    for page in pages:
+        if runs and page == runs[-1][1] + 1:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+    return ",".join(f"{first}-{last}" if first != last else str(first) for first, last in runs)
+
+
+def _extract_shard(pdf_path: str, pages: Tuple[int, ...], flavor: str) -> Tuple[list, Optional[str]]:
+    """Run Camelot over a set of pages: ([(page, order, DataFrame), ...], error)."""
+    try:
+        import camelot
+        tables = camelot.read_pdf(pdf_path, pages=page_spec(pages), flavor=flavor)
+        return [(int(table.page), i, table.df) for i, table in enumerate(tables)], None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def _worker(conn, flavor: str):
+    """Pool worker: extract shards sent over its own pipe until it is closed or sent None."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        task_id, pdf_path, pages = task
+        conn.send((task_id, *_extract_shard(pdf_path, pages, flavor)))
+
+
+def extract_tables_parallel(
+    pdf_paths: List[str],
+    max_workers: Optional[int] = None,
+    pages_per_shard: int = 4,
+    page_timeout: float = 60.0,
+    flavor: str = "stream",
+    document_cache=None,
+    pages: Optional[Dict[str, Sequence[int]]] = None,
+) -> Dict[str, list]:
+    """
+    Extract tables from PDFs with Camelot across a pool of worker processes.
+
+    Each PDF is sharded into groups of pages, shards from all PDFs run on a pool of up to
+    `max_workers` long-lived processes (each imports Camelot once), and each PDF's tables
+    are merged back in page order. A shard that runs longer than `page_timeout` seconds
+    per page has its worker killed and replaced and its pages skipped, so one
+    pathological page cannot stall the batch. Every worker returns results over its own
+    pipe, so a killed worker cannot corrupt the others'.
+
+    Page counts come from the parse-once document cache, and the tables of a PDF are
+    stored there once all its shards succeed, so an unchanged PDF is not handed to
+    Camelot again (unless pages it was not scanned on are now requested).
+
+    Args:
+      pdf_paths: PDFs to process.
+      max_workers: Worker processes (defaults to the CPU count).
+      pages_per_shard: Pages handed to a worker at a time.
+      page_timeout: Seconds allowed per page in a shard.
+      flavor: Camelot parsing flavor.
+      document_cache: DocumentCache to use; defaults to the process-wide one.
+      pages: Optional {pdf_path: [1-based page, ...]} limiting which pages Camelot sees
+        (e.g. table_classifier candidates); PDFs not listed are scanned in full.
+
+    Returns:
+      dict: {pdf_path: [DataFrame, ...]} in page order.
+    """
+    import pandas as pd
+
+    if document_cache is None:
+        from registry import get_document_cache
+        document_cache = get_document_cache()
+
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = deque()
+    found: Dict[str, list] = {path: [] for path in pdf_paths}
+    failed = set()  # PDFs with a skipped shard; their partial results are not cached
+    scanned: Dict[str, Optional[List[int]]] = {}
+    for path in pdf_paths:
+        parsed = document_cache.get(path)
+        wanted = sorted(set(pages[path])) if pages is not None and path in pages else None
+        if parsed.tables is not None and (
+            parsed.tables_pages is None or (wanted is not None and set(wanted) <= set(parsed.tables_pages))
+        ):
+            found[path] = [
+                (page, order, pd.DataFrame(rows)) for page, order, rows in parsed.tables
+                if wanted is None or page in wanted
+            ]
+            continue
+        scanned[path] = wanted
+        selected = wanted if wanted is not None else range(1, parsed.page_count + 1)
+        for i in range(0, len(selected), pages_per_shard):
+            tasks.append((len(tasks), path, tuple(selected[i:i + pages_per_shard])))
+
+    ctx = mp.get_context()
+    if tasks and ctx.get_start_method() == "fork":
+        import camelot  # noqa: F401  Preload once so forked workers skip the import
+
+    def start_worker():
+        # Each worker has its own pipe, so killing one cannot corrupt another's results
+        conn, child_conn = ctx.Pipe()
+        proc = ctx.Process(target=_worker, args=(child_conn, flavor), daemon=True)
+        proc.start()
+        child_conn.close()
+        return proc, conn
+
+    def stop(proc, conn, kill=False):
+        if not kill:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            proc.join(5)
+        if proc.is_alive():
+            proc.terminate()
+        proc.join()
+        conn.close()
+
+    shard_count = len(tasks)
+    idle = [start_worker() for _ in range(min(max_workers, len(tasks)))]
+    busy = {}  # conn -> (process, task, started)
+    started_at = time.perf_counter()
+    try:
+        while tasks or busy:
+            while tasks and idle:
+                proc, conn = idle.pop()
+                task = tasks.popleft()
+                conn.send(task)
+                busy[conn] = (proc, task, time.monotonic())
+
+            for conn in wait(list(busy), timeout=0.5):
+                proc, (_, path, shard_pages), _ = busy.pop(conn)
+                try:
+                    _, tables, error = conn.recv()
+                except (EOFError, OSError):
+                    print(f"Worker for {os.path.basename(path)} pages {page_spec(shard_pages)} exited without results.")
+                    failed.add(path)
+                    stop(proc, conn)
+                    if tasks:
+                        idle.append(start_worker())
+                    continue
+                if error:
+                    print(f"Table extraction failed for {os.path.basename(path)} pages {page_spec(shard_pages)}: {error}")
+                    failed.add(path)
+                found[path].extend(tables)
+                idle.append((proc, conn))
+
+            now = time.monotonic()
+            for conn, (proc, (_, path, shard_pages), started) in list(busy.items()):
+                if now - started > page_timeout * len(shard_pages):
+                    del busy[conn]
+                    stop(proc, conn, kill=True)
+                    print(f"Timed out extracting tables from {os.path.basename(path)} pages {page_spec(shard_pages)}; skipped.")
+                    failed.add(path)
+                    if tasks:
+                        idle.append(start_worker())
+    finally:
+        for proc, conn in idle:
+            stop(proc, conn)
+        for conn, (proc, _, _) in busy.items():
+            stop(proc, conn, kill=True)
+
+    for path, wanted in scanned.items():
+        if path not in failed:
+            document_cache.set_tables(path, [(page, order, df.values.tolist()) for page, order, df in found[path]], pages=wanted)
+
+    print(f"Extracted tables from {len(pdf_paths)} PDFs ({shard_count} shards) in {time.perf_counter() - started_at:.1f}s")
+    return {path: [df for _, _, df in sorted(tables, key=lambda t: (t[0], t[1]))] for path, tables in found.items()}
@@ -0,0 +1,161 @@
+import re
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+CACHE_PATH = "table_summaries.sqlite"
+
+_PACK_MARKER = re.compile(r"\[\[TABLE (\d+)\]\]")
+
+
+def table_rows(table) -> List[List[str]]:
+    """Rows of a pandas DataFrame or a pdfplumber list-of-lists as stripped strings."""
+    rows = table.values.tolist() if hasattr(table, "values") else table
+    return [["" if cell is None else re.sub(r"\s+", " ", str(cell)).strip() for cell in row] for row in rows]
+
+
+def canonicalize_table(table) -> str:
+    """
+    Canonical text for a table: cells whitespace-normalized, empty rows and columns
+    dropped. Tables that differ only in layout noise share the same canonical form.
+    """
+    rows = [row for row in table_rows(table) if any(row)]
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    keep = [j for j in range(width) if any(row[j] for row in rows)]
+    return "\n".join(" | ".join(row[j] for j in keep) for row in rows)
+
+
+def table_text(table) -> str:
+    """Text sent to the LLM for a table, as the callers have always sent it."""
+    return table.to_string() if hasattr(table, "to_string") else str(table)
+
+
+class TableSummarizer:
+    """
+    Summarizes many tables concurrently, each distinct table once.
+
+    Tables are keyed by a hash of their canonical content (plus a namespace for the prompt
+    in use), so repeated headers, footers and identical tables across reports hit the
+    SQLite cache instead of the LLM. Uncached tables are summarized on a bounded thread
+    pool. With `pack_max_chars` set, small tables are packed several to a request and the
+    reply is split back per table; a reply that cannot be split falls back to one request
+    per table. A failed request yields the raw table text, which is not cached.
+    """
+
+    def __init__(
+        self,
+        summarize_fn: Callable[[str], str],
+        namespace: str,
+        max_concurrency: int = 8,
+        pack_max_chars: int = 0,
+        small_table_chars: int = 1500,
+        cache_path: str = CACHE_PATH,
+    ):
+        self.summarize_fn = summarize_fn
+        self.namespace = namespace
+        self.max_concurrency = max_concurrency
+        self.pack_max_chars = pack_max_chars
+        self.small_table_chars = small_table_chars
+        self.stats = {"tables": 0, "unique": 0, "cache_hits": 0, "requests": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+        self._db.commit()
+
+    def _key(self, canonical: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{canonical}".encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _store(self, key: str, summary: str):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?)", (key, summary))
+            self._db.commit()
+
+    def _call(self, text: str) -> str:
+        with self._lock:
+            self.stats["requests"] += 1
+        return self.summarize_fn(text)
+
+    def _summarize_one(self, key: str, text: str) -> str:
+        try:
+            summary = self._call(text)
+        except Exception as e:
+            print(f"Table summarization failed: {e}")
+            return text
+        self._store(key, summary)
+        return summary
+
+    def _summarize_pack(self, pack: List[tuple]) -> dict:
+        if len(pack) == 1:
+            key, text = pack[0]
+            return {key: self._summarize_one(key, text)}
+        prompt = (
+            f"Summarize each of the following {len(pack)} tables separately, one paragraph per table. "
+            "Start each paragraph with its marker, e.g. [[TABLE 1]], on its own line.\n\n"
+            + "\n\n".join(f"[[TABLE {n}]]\n{text}" for n, (_, text) in enumerate(pack, 1))
+        )
+        try:
+            parts = _PACK_MARKER.split(self._call(prompt))
+            by_number = {int(parts[i]): parts[i + 1].strip() for i in range(1, len(parts) - 1, 2)}
+        except Exception as e:
+            print(f"Packed table summarization failed: {e}")
+            by_number = {}
+        if sorted(by_number) != list(range(1, len(pack) + 1)) or not all(by_number.values()):
+            return {key: self._summarize_one(key, text) for key, text in pack}
+        for n, (key, _) in enumerate(pack, 1):
+            self._store(key, by_number[n])
+        return {key: by_number[n] for n, (key, _) in enumerate(pack, 1)}
+
+    def _packs(self, pending: dict) -> List[List[tuple]]:
+        if not self.pack_max_chars:
+            return [[item] for item in pending.items()]
+        packs, current, size = [], [], 0
+        for key, text in pending.items():
+            if len(text) > self.small_table_chars:
+                packs.append([(key, text)])
+                continue
+            if current and size + len(text) > self.pack_max_chars:
+                packs.append(current)
+                current, size = [], 0
+            current.append((key, text))
+            size += len(text)
+        if current:
+            packs.append(current)
+        return packs
+
+    def summarize_many(self, tables: list) -> List[str]:
+        """
+        Summarize tables (DataFrames or lists of rows).
+
+        Returns:
+          list: One summary per input table, in input order.
+        """
+        keys = [self._key(canonicalize_table(t)) for t in tables]
+        summaries, pending = {}, {}
+        for key, table in zip(keys, tables):
+            if key in summaries or key in pending:
+                continue
+            cached = self._cached(key)
+            if cached is not None:
+                summaries[key] = cached
+                self.stats["cache_hits"] += 1
+            else:
+                pending[key] = table_text(table)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                for result in pool.map(self._summarize_pack, self._packs(pending)):
+                    summaries.update(result)
+
+        self.stats["tables"] += len(tables)
+        self.stats["unique"] += len(set(keys))
+        return [summaries[key] for key in keys]
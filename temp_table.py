@@ -1,14 +1,15 @@
-import camelot
-from IPython.display import display
 import os
-from agno.agent import Agent, RunResponse
-from agno.models.azure import AzureOpenAI as AOI
-from langchain.vectorstores.chroma import Chroma
-from langchain_openai import AzureOpenAIEmbeddings
-from langchain.docstore.document import Document  # <-- added import
-import shutil
 from dotenv import load_dotenv
 import warnings
+import threading
+from typing import TYPE_CHECKING
+import registry
+from registry import get_document_cache, get_embeddings, make_agno_model
+from table_extraction import extract_tables_parallel
+from table_summarizer import TableSummarizer
+
+if TYPE_CHECKING:
+    from agno.agent import RunResponse
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
@@ -38,94 +39,139 @@ embedding_deployment_name = os.environ.get("ADA_AZURE_OPENAI_DEPLOYMENT")
 #########################################
 ### Azure OpenAI and LangChain Setup ###
 #########################################
-# Embeddings for Chroma
-embedder = AzureOpenAIEmbeddings(
-    model=embedding_model_name,
-    api_key=embedding_api_key,
-    azure_endpoint=embedding_endpoint_url,
-    api_version="2024-10-21"
-)
+# Embeddings for Chroma come from the registry (`embedder` below); the shared embedder is
+# cached so rebuilding the store does not re-embed unchanged summaries.
+# Agno and LangChain are imported on first use, so importing this module stays cheap.
 
 # Agent setup for summarization
-agent = Agent(
-    model=AOI(
-        id=model_name,
-        api_key=api_key,
-        azure_endpoint=endpoint_url,
-        azure_deployment=deployment_name
-    ),
-    description="You are a finance analyst that researches income, balance sheet, and cash flow statements, and annual reports of companies. Generate concise expert summaries of the provided tables, including all key details and numerics.",
-    instructions=["Summarize the table/dataframe into a single paragraph without missing any important details and include all the numericals."],
-    show_tool_calls=True,
-    markdown=True,
-    debug_mode=True
-)
+def make_summary_agent():
+    from agno.agent import Agent
+    return Agent(
+        model=make_agno_model(),
+        description="You are a finance analyst that researches income, balance sheet, and cash flow statements, and annual reports of companies. Generate concise expert summaries of the provided tables, including all key details and numerics.",
+        instructions=["Summarize the table/dataframe into a single paragraph without missing any important details and include all the numericals."],
+        show_tool_calls=True,
+        markdown=True,
+        debug_mode=True
+    )
+
+# Summaries run on worker threads; each thread gets its own agent
+_thread_agents = threading.local()
+
+def summarize_table(table_text):
+    if not hasattr(_thread_agents, "agent"):
+        _thread_agents.agent = make_summary_agent()
+    response: RunResponse = _thread_agents.agent.run(table_text)
+    return response.content
+
+# Identical tables (repeated headers/footers, same statement across reports) are summarized once
+def make_table_summarizer():
+    return TableSummarizer(
+        summarize_table,
+        namespace="temp_table.summary_agent",
+        max_concurrency=int(os.environ.get("TABLE_SUMMARY_CONCURRENCY", "8")),
+        pack_max_chars=int(os.environ.get("TABLE_PACK_MAX_CHARS", "0")),
+    )
+
+registry.register("temp_table.summary_agent", make_summary_agent)
+registry.register("temp_table.table_summarizer", make_table_summarizer)
+
+__getattr__ = registry.lazy_module_attrs(__name__, {
+    "agent": "temp_table.summary_agent",
+    "embedder": "azure_openai.embeddings",
+    "table_summarizer": "temp_table.table_summarizer",
+})
 
 ############################################
 ### Function to Process PDF and Summarize ###
 ############################################
-def process_pdfs_in_directory(directory_path):
+def process_pdfs_in_directory(directory_path, max_workers=None, page_timeout=60.0):
     """
     Processes all PDF files in a directory, extracts tables, summarizes them, and stores them in a Chroma database.
+    Camelot only runs on pages the table pre-classifier picks (TABLE_PAGE_THRESHOLD,
+    TABLE_PAGE_AUDIT_RATE).
 
     Args:
       directory_path (str): Path to the directory containing PDF files.
+      max_workers (int, optional): Processes used for table extraction. Defaults to the CPU count.
+      page_timeout (float, optional): Seconds allowed per page before a page range is skipped.
 
     Returns:
       None
     """
-    all_summaries = []  # Collect all summaries from all PDFs
+    from IPython.display import display
+    from table_classifier import TablePageClassifier
 
-    # Loop through all PDF files in the directory
-    for filename in os.listdir(directory_path):
-        if filename.endswith(".pdf"):  # Only process .pdf files
-            pdf_file_path = os.path.join(directory_path, filename)
-            print(f"\nProcessing PDF: {filename}")
-
-            # Step 1: Extract tables using Camelot
-            tables = camelot.read_pdf(pdf_file_path, pages="all", flavor="stream")
-            filtered_tables = []
-
-            for i, table in enumerate(tables):
-                num_columns = table.df.shape[1]
-                if num_columns > 1:  # Only consider tables with multiple columns
-                    print(f"\nTable {i + 1} from {filename} (Columns: {num_columns}):")
-                    display(table.df)  # Use Jupyter display for pretty printing
-                    filtered_tables.append(table.df)
-
-            # Step 2: Generate summaries from tables 
-            for table_df in filtered_tables:
-                finance_narrative_response: RunResponse = agent.run(table_df.to_string())
-                print(f"\nSummary generated for Table {i + 1} in {filename}:\n{finance_narrative_response.content}")
-                all_summaries.append(finance_narrative_response.content)  # Collect the summary
+    table_summarizer = registry.get("temp_table.table_summarizer")
+    all_summaries = []  # Collect all summaries from all PDFs
+    all_metadatas = []  # Source PDF and table number of each summary
+    all_tables = []  # (filename, table number, DataFrame) across all PDFs
+
+    # Step 1: Extract tables from all PDFs in parallel, sharded by page range
+    pdf_paths = [
+        os.path.join(directory_path, filename)
+        for filename in os.listdir(directory_path)
+        if filename.endswith(".pdf")  # Only process .pdf files
+    ]
+    document_cache = get_document_cache()
+    classifier = TablePageClassifier.from_env()
+    page_texts = {path: [page["text"] for page in document_cache.get(path).pages] for path in pdf_paths}
+    selected = {path: classifier.select_pages(texts) for path, texts in page_texts.items()}
+    tables_by_pdf = extract_tables_parallel(
+        pdf_paths, max_workers=max_workers, page_timeout=page_timeout, document_cache=document_cache, pages=selected
+    )
+    for path, texts in page_texts.items():
+        parsed = document_cache.get(path)
+        if parsed.tables is not None and parsed.tables_pages == selected[path]:
+            classifier.record(texts, selected[path], [page for page, _, _ in parsed.tables])
+    print(f"Table page pre-classifier: {classifier.stats()}")
+
+    for pdf_file_path, tables in tables_by_pdf.items():
+        filename = os.path.basename(pdf_file_path)
+        print(f"\nProcessing PDF: {filename}")
+        filtered_tables = []
+
+        for i, table_df in enumerate(tables):
+            num_columns = table_df.shape[1]
+            if num_columns > 1:  # Only consider tables with multiple columns
+                print(f"\nTable {i + 1} from {filename} (Columns: {num_columns}):")
+                display(table_df)  # Use Jupyter display for pretty printing
+                filtered_tables.append(table_df)
+                all_tables.append((filename, i + 1, table_df))
+
+    # Step 2: Generate summaries from tables concurrently
+    summaries = table_summarizer.summarize_many([table_df for _, _, table_df in all_tables])
+    for (filename, table_number, _), summary in zip(all_tables, summaries):
+        print(f"\nSummary generated for Table {table_number} in {filename}:\n{summary}")
+        all_summaries.append(summary)  # Collect the summary
+        all_metadatas.append({"source": filename, "table": table_number})
+    print(f"Table summarization: {table_summarizer.stats}")
 
     # Save all summaries to Chroma
-    save_to_chroma(all_summaries)
+    save_to_chroma(all_summaries, all_metadatas)
 
-def save_to_chroma(summaries):
+def save_to_chroma(summaries, metadatas=None):
     """
     Save the given list of summaries (strings) to a Chroma database.
 
+    The store is rebuilt as a new version beside the live one and swapped in atomically
+    when complete, so readers (RAG_pdf) never see it empty; summaries unchanged since
+    the previous version reuse their vectors, and old versions are garbage-collected.
+
     Args:
       summaries: List of summaries (string format).
+      metadatas: Optional metadata per summary (source PDF, table number).
     """
-    # Convert summaries into LangChain Document objects
-    documents = [Document(page_content=summary, metadata={}) for summary in summaries]
-
-    # Clear out the existing database directory, if it exists
-    if os.path.exists(CHROMA_PATH):
-        shutil.rmtree(CHROMA_PATH)
-
-    # Create a new Chroma database from summaries using OpenAI embeddings
-    db = Chroma.from_documents(
-        documents,
-        embedder,
-        persist_directory=CHROMA_PATH
-    )
+    from versioned_store import VersionedStore, rebuild_chroma
+
+    embedder = get_embeddings()
+    if metadatas is None:
+        metadatas = [{"source": "table_summary"} for _ in summaries]
 
-    # Persist the database to disk
-    db.persist()
-    print(f"\nSaved {len(documents)} summaries to Chroma at {CHROMA_PATH}.")
+    stats = rebuild_chroma(VersionedStore(CHROMA_PATH), summaries, metadatas, embedder)
+    print(f"\nSaved {stats['documents']} summaries to Chroma at {CHROMA_PATH} (version {stats['version']}).")
+    print(f"Reused {stats['reused']} vectors, embedded {stats['embedded']}; removed old versions: {stats['removed_versions']}")
+    print(f"Embedding cache: {embedder.stats()}")
 
 ##################################
 ### Execution Begins Here ###
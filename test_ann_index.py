@@ -0,0 +1,40 @@
+import numpy as np
+
+from ann_index import ANNIndex
+
+
+class _EmptyCollection:
+    def count(self):
+        return 0
+
+    def get(self, **kwargs):
+        return {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+
+
+def test_build_empty(tmp_path):
+    index = ANNIndex.build(str(tmp_path), [], [], [])
+    assert len(index) == 0
+    assert index.search(np.ones(8), k=4) == []
+    assert ANNIndex.load(str(tmp_path)).search(np.ones(8), k=4) == []
+
+
+def test_from_empty_collection(tmp_path):
+    index = ANNIndex.from_chroma(_EmptyCollection(), str(tmp_path))
+    assert len(index) == 0
+    assert index.search(np.ones(8), k=4, where={"company": "acme"}) == []
+
+
+def test_default_nprobe_recall(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((5000, 64)).astype(np.float32)
+    queries = rng.standard_normal((50, 64)).astype(np.float32)
+    index = ANNIndex.build(str(tmp_path), [str(i) for i in range(len(vectors))], vectors, [""] * len(vectors), quantize="float32")
+    assert len(index.offsets) - 1 > 1
+    assert index.nprobe >= (len(index.offsets) - 1) / 8
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    recall = np.mean([
+        len({str(i) for i in np.argsort(-(unit @ query))[:10]} & {doc_id for doc_id, _ in index.search(query, k=10)}) / 10
+        for query in queries
+    ])
+    assert recall >= 0.85
@@ -0,0 +1,26 @@
+import re
+
+from company_namespace import NamespaceCatalog, company_slug, detect_fiscal_year
+
+# Chroma: 3-63 characters of [a-zA-Z0-9._-], starting and ending with an alphanumeric
+_CHROMA_NAME = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._-]{1,61}[a-zA-Z0-9]$")
+
+
+def test_long_name_slug_is_a_valid_collection_name(tmp_path):
+    # The 48-character cut falls right after a "-"
+    name = "Housing Development Finance Corporation Limited Mutual Fund Trustees"
+    slug = company_slug(name)
+    assert len(slug) <= 48
+    assert not slug.endswith("-")
+    assert _CHROMA_NAME.match(NamespaceCatalog(str(tmp_path)).collection_name(slug))
+
+
+def test_slug_of_unusable_name():
+    assert company_slug("---") == "unknown"
+    assert company_slug("X Ltd.") == "x-ltd"
+
+
+def test_fiscal_year_ranges():
+    assert detect_fiscal_year("AR_FY2023-24.pdf") == "FY2024"
+    assert detect_fiscal_year("annual_report_2023-24.pdf") == "FY2024"
+    assert detect_fiscal_year("report.pdf", ["For the year ended March 31, 2024"]) == "FY2024"
@@ -0,0 +1,42 @@
+import random
+import re
+
+from keyword_scanner import KeywordScanner
+
+
+def _findall_counts(keywords, texts):
+    """The per-keyword findall loop count_keyword_occurrences used before the scanner."""
+    patterns = {kw: re.compile(r"\b" + re.escape(kw) + r"\b", re.IGNORECASE) for kw in keywords}
+    return {kw: sum(len(pat.findall(text)) for text in texts) for kw, pat in patterns.items()}
+
+
+def test_self_overlapping_keywords():
+    assert KeywordScanner(["a a"]).count_many(["a a a"]) == {"a a": 1}
+    assert KeywordScanner(["net profit net", "net"]).count_many(["net profit net profit net"]) == {
+        "net profit net": 1,
+        "net": 3,
+    }
+
+
+def test_case_folding():
+    assert KeywordScanner(["info"]).count_many(["İnfo", "INFO info"]) == _findall_counts(["info"], ["İnfo", "INFO info"])
+
+
+def test_matches_findall_on_random_text():
+    rng = random.Random(0)
+    vocabulary = [
+        "net", "profit", "a", "management", "management's", "discussion", "and", "analysis", "risk",
+        "factors", "Revenue", "growth", "going", "concern", "İnfo", "info", "RISK", "x", "-", ",",
+    ]
+    keyword_pool = [
+        "net", "net profit", "net profit net", "a", "a a", "a a a", "management",
+        "management's discussion and analysis", "risk", "risk factors", "Revenue", "revenue growth",
+        "going concern", "info", "profit net", "and analysis",
+    ]
+    for _ in range(300):
+        keywords = rng.sample(keyword_pool, rng.randint(1, len(keyword_pool)))
+        texts = [
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 80)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        assert KeywordScanner(keywords).count_many(texts) == _findall_counts(keywords, texts), (keywords, texts)
@@ -0,0 +1,189 @@
+import re
+import time
+import sqlite3
+import threading
+import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Optional
+
+YAHOO_SEARCH_URL = "https://query1.finance.yahoo.com/v1/finance/search"
+CACHE_PATH = "ticker_cache.sqlite"
+
+# Sentinel for "looked up, no ticker exists" so misses are cached too
+_NOT_FOUND = ""
+
+
+def normalize_company_name(company_name: str) -> str:
+    """Case- and whitespace-insensitive cache key for a company name."""
+    return re.sub(r"\s+", " ", company_name).strip().lower()
+
+
+def to_nse_symbol(symbol: str) -> str:
+    """Map a Yahoo symbol onto its NSE listing (.NS), converting BSE (.BO) symbols."""
+    if symbol.endswith(".NS"):
+        return symbol
+    elif symbol.endswith(".BO"):
+        return symbol[:-3] + ".NS"
+    else:
+        return symbol + ".NS"
+
+
+class TickerResolver:
+    """
+    Resolves company names to NSE tickers through the Yahoo Finance search endpoint.
+
+    Lookups go through an in-memory LRU, then a SQLite cache on disk, and only then the
+    network. Hits expire after `ttl` seconds; names with no ticker are cached as misses
+    for the shorter `negative_ttl`. HTTP calls share one pooled requests.Session with a
+    timeout. Request failures are raised and never cached.
+    """
+
+    def __init__(
+        self,
+        cache_path: str = CACHE_PATH,
+        ttl: float = 7 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+        max_memory_entries: int = 4096,
+        timeout: float = 10.0,
+        max_workers: int = 8,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_memory_entries = max_memory_entries
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "network_calls": 0, "errors": 0}
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tickers (name TEXT PRIMARY KEY, ticker TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+
+    # -----------------------------
+    # Cache layers
+    # -----------------------------
+    def _is_fresh(self, ticker: str, fetched_at: float) -> bool:
+        ttl = self.negative_ttl if ticker == _NOT_FOUND else self.ttl
+        return time.time() - fetched_at < ttl
+
+    def _get_cached(self, key: str) -> Optional[str]:
+        """Return the cached ticker ("" for a cached miss) or None if not cached / expired."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._is_fresh(*entry):
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+
+            row = self._db.execute("SELECT ticker, fetched_at FROM tickers WHERE name = ?", (key,)).fetchone()
+            if row is not None and self._is_fresh(*row):
+                self._remember(key, row)
+                self.stats["disk_hits"] += 1
+                return row[0]
+        return None
+
+    def _remember(self, key: str, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, key: str, ticker: str):
+        entry = (ticker, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            self._db.execute("INSERT OR REPLACE INTO tickers VALUES (?, ?, ?)", (key, *entry))
+            self._db.commit()
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def _fetch(self, company_name: str) -> str:
+        with self._lock:
+            self.stats["network_calls"] += 1
+        response = self.session.get(YAHOO_SEARCH_URL, params={"q": company_name}, timeout=self.timeout)
+        response.raise_for_status()
+        for result in response.json().get("quotes", []):
+            return to_nse_symbol(result.get("symbol", ""))
+        return _NOT_FOUND
+
+    def resolve(self, company_name: str) -> Optional[str]:
+        """Return the NSE ticker for a company name, or None if Yahoo has no match."""
+        key = normalize_company_name(company_name)
+        ticker = self._get_cached(key)
+        if ticker is None:
+            ticker = self._fetch(company_name)
+            self._store(key, ticker)
+        return ticker or None
+
+    def resolve_many(self, company_names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve many names at once. Names are deduplicated on their normalized form and
+        uncached ones are fetched concurrently. A name whose lookup fails (network or HTTP
+        error) maps to None and is not cached; the other results are still returned and
+        stored.
+
+        Returns:
+          dict: {company_name: ticker or None} for every input name.
+        """
+        company_names = list(company_names)
+        by_key = {}
+        for name in company_names:
+            by_key.setdefault(normalize_company_name(name), name)
+
+        resolved = {}
+        pending = {}
+        for key, name in by_key.items():
+            ticker = self._get_cached(key)
+            if ticker is None:
+                pending[key] = name
+            else:
+                resolved[key] = ticker
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {key: pool.submit(self._fetch, name) for key, name in pending.items()}
+            for key, future in futures.items():
+                try:
+                    ticker = future.result()
+                except Exception as e:
+                    # One failed lookup must not lose the others; it is not cached, so it is retried next time
+                    print(f"Error looking up ticker for {pending[key]}: {e}")
+                    with self._lock:
+                        self.stats["errors"] += 1
+                    resolved[key] = _NOT_FOUND
+                    continue
+                self._store(key, ticker)
+                resolved[key] = ticker
+
+        return {name: resolved[normalize_company_name(name)] or None for name in company_names}
+
+
+_resolver: Optional[TickerResolver] = None
+
+
+def get_resolver() -> TickerResolver:
+    """Process-wide resolver, created on first use."""
+    global _resolver
+    if _resolver is None:
+        _resolver = TickerResolver()
+    return _resolver
+
+
+def resolve_ticker(company_name: str) -> Optional[str]:
+    return get_resolver().resolve(company_name)
+
+
+def resolve_many(company_names: Iterable[str]) -> Dict[str, Optional[str]]:
+    return get_resolver().resolve_many(company_names)
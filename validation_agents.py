@@ -1,10 +1,8 @@
 from pydantic import BaseModel, Field
-from collections import defaultdict
-from langchain_community.document_loaders import PyPDFDirectoryLoader
-import re
+from pdf_stream import iter_pdf_pages
+from keyword_scanner import get_scanner
 from dotenv import load_dotenv
-from langchain_openai import AzureOpenAIEmbeddings
-from openai import AzureOpenAI
+from registry import get_chat_client, lazy_module_attrs
 import os
 import json
 
@@ -25,20 +23,12 @@ embedding_model_name = os.environ.get("ADA_AZURE_OPENAI_MODEL_NAME")
 embedding_endpoint_url = os.environ.get("ADA_AZURE_OPENAI_ENDPOINT")
 embedding_api_key = os.environ.get("ADA_AZURE_OPENAI_API_KEY")
 
-# Client setup
-client = AzureOpenAI(
-    azure_endpoint=endpoint_url,
-    azure_deployment=deployment_name,
-    api_key=api_key,
-    api_version=version_number,
-)
-
-embedder = AzureOpenAIEmbeddings(
-    model=embedding_model_name,
-    api_key=embedding_api_key,
-    azure_endpoint=embedding_endpoint_url,
-    api_version="2024-10-21",
-)
+# Client setup: the chat client and embedder are shared through the registry and
+# created on first use (`client` and `embedder` remain importable from this module)
+__getattr__ = lazy_module_attrs(__name__, {
+    "client": "azure_openai.chat_client",
+    "embedder": "azure_openai.embeddings",
+})
 
 class Name_Validate(BaseModel):
     company_names: list[str] = Field(..., description="List of correct company name, and alternative names and abbreviations")
@@ -76,15 +66,12 @@ def count_keyword_occurrences(company_names, docs, keywords):
     # print(type(company_names))
 
     print(company_names["company_names"])
-    keywords+=company_names["company_names"]
-    patterns = {kw: re.compile(r'\b' + re.escape(kw) + r'\b', re.IGNORECASE) for kw in keywords}
-    kw_counts = defaultdict(int)
-    for doc in docs:
-        for kw, pat in patterns.items():
-            matches = pat.findall(doc)
-            kw_counts[kw] += len(matches)
-    print(dict(kw_counts))
-    return dict(kw_counts)
+    # Aliases are scanned alongside the keywords without growing the shared keyword list;
+    # all terms are counted in one pass per page by a scanner compiled once per term set
+    terms = tuple(keywords) + tuple(company_names["company_names"])
+    kw_counts = get_scanner(terms).count_many(docs)
+    print(kw_counts)
+    return kw_counts
 
 # Name Validation Agent
 class NameValidationAgent:
@@ -99,7 +86,7 @@ class NameValidationAgent:
                 "content": f"COMPANY NAME:\n{company_name}"
             }
         ]
-        response = client.beta.chat.completions.parse(
+        response = get_chat_client().beta.chat.completions.parse(
             messages=prompt,
             model=model_name,
             response_format= Name_Validate
@@ -121,22 +108,15 @@ class ParentValidationAgent:
                 "content": f"COMPANY NAME:\n{company_names}\n\nDOCUMENT CONTENT COUNTS:\n{keyword_counts}"
             }
         ]
-        response = client.beta.chat.completions.parse(
+        response = get_chat_client().beta.chat.completions.parse(
             messages=prompt,
             model=model_name,
             response_format=Docs_Validate
         )
         return response.choices[0].message.content
 
-# PDF Loading
-loader = PyPDFDirectoryLoader(
-    path=DATA_PATH,
-    glob="**/[!.]*.pdf"
-)
-docs = loader.load()
-
-documents = [doc.page_content for doc in docs]  # Extract document content
-print(documents)
+# PDF Loading: pages are parsed lazily, one at a time, as the documents are consumed
+documents = (doc.page_content for doc in iter_pdf_pages(DATA_PATH))  # Extract document content
 
 # MAIN FUNCTION EXECUTION
 if __name__ == "__main__":
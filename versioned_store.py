@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+POINTER_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+class VersionedStore:
+    """
+    Blue/green generations of a persisted vector store under one root directory.
+
+    Each build goes into its own directory, root/versions/<version>, beside the live one.
+    Once complete it is published by atomically replacing the small root/CURRENT pointer
+    file, so readers only ever see a finished store. Readers compare current_version()
+    with the one they opened and reopen on change. Generations older than the newest
+    `keep` are garbage-collected after each publish. A root without a pointer (a store
+    written before versioning) is served as-is until the first publish.
+    """
+
+    def __init__(self, root: str, keep: int = 2):
+        self.root = root
+        self.keep = max(1, keep)
+
+    @property
+    def _pointer(self) -> str:
+        return os.path.join(self.root, POINTER_FILE)
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.root, VERSIONS_DIR, version)
+
+    def _read_pointer(self) -> Dict:
+        try:
+            with open(self._pointer) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def current_version(self) -> Optional[str]:
+        return self._read_pointer().get("version")
+
+    def current_path(self) -> str:
+        """Directory of the live generation (the root itself for an unversioned store)."""
+        version = self.current_version()
+        return self.version_path(version) if version else self.root
+
+    def versions(self) -> List[str]:
+        """All generation directories, oldest first."""
+        directory = os.path.join(self.root, VERSIONS_DIR)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def new_version(self) -> str:
+        """Create an empty directory for the next generation and return its version."""
+        version = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() % 1_000_000_000:09d}"
+        os.makedirs(self.version_path(version))
+        return version
+
+    def publish(self, version: str):
+        """Make `version` the live generation."""
+        history = self._read_pointer().get("history", []) + [version]
+        tmp_path = self._pointer + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": version, "published_at": time.time(), "history": history[-self.keep:]}, f)
+        os.replace(tmp_path, self._pointer)
+
+    def gc(self) -> List[str]:
+        """
+        Delete generations other than the newest `keep` published ones, including builds
+        that were abandoned before publishing. Builds newer than the live version (still in
+        progress) are left alone, as is anything that cannot be removed yet (e.g. still
+        open on Windows); it is retried on the next publish.
+        """
+        pointer = self._read_pointer()
+        current = pointer.get("version")
+        if current is None:
+            return []
+        retained = set(pointer.get("history", [current]))
+        removed = []
+        for version in self.versions():
+            if version > current or version in retained:
+                continue
+            try:
+                shutil.rmtree(self.version_path(version))
+                removed.append(version)
+            except OSError:
+                pass
+        return removed
+
+
+def content_id(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def rebuild_chroma(store: VersionedStore, texts: Sequence[str], metadatas: Sequence[dict], embeddings,
+                   collection_name: str = "langchain") -> Dict:
+    """
+    Build a new generation of a Chroma store from `texts` and publish it.
+
+    Documents are keyed by a hash of their text; any already in the live generation have
+    their vectors copied over instead of being embedded again. Identical texts are
+    stored once. Each document needs non-empty metadata (a Chroma requirement).
+
+    Returns:
+      dict: version, documents, reused / embedded counts and garbage-collected versions.
+    """
+    from langchain.vectorstores.chroma import Chroma
+    from embedding_pipeline import add_in_batches, embed_texts
+    from chroma_adapter import chroma_collection
+
+    by_id: Dict[str, tuple] = {}
+    for text, metadata in zip(texts, metadatas):
+        by_id.setdefault(content_id(text), (text, metadata))
+    ids = list(by_id)
+
+    reused: Dict[str, List[float]] = {}
+    previous = store.current_path()
+    if ids and os.path.exists(os.path.join(previous, "chroma.sqlite3")):
+        live = Chroma(collection_name=collection_name, persist_directory=previous, embedding_function=embeddings)
+        stored = live.get(ids=ids, include=["embeddings"])
+        reused = dict(zip(stored["ids"], stored["embeddings"]))
+
+    version = store.new_version()
+    db = Chroma(collection_name=collection_name, persist_directory=store.version_path(version), embedding_function=embeddings)
+    missing = [doc_id for doc_id in ids if doc_id not in reused]
+    fresh = dict(zip(missing, embed_texts(embeddings.embed_documents, [by_id[i][0] for i in missing]))) if missing else {}
+    add_in_batches(
+        chroma_collection(db, required=True),
+        ids,
+        [by_id[i][0] for i in ids],
+        [by_id[i][1] for i in ids],
+        [list(reused[i]) if i in reused else fresh[i] for i in ids],
+    )
+
+    store.publish(version)
+    return {
+        "version": version,
+        "documents": len(ids),
+        "reused": len(reused),
+        "embedded": len(missing),
+        "removed_versions": store.gc(),
+    }
@@ -2,7 +2,7 @@ import json
 import pandas as pd  # Import pandas for dataframe creation
 from dotenv import load_dotenv
 from agno.agent import Agent
-from agno.models.azure import AzureOpenAI as AOI
+from registry import make_agno_model
 from agno.tools import tool
 from firecrawl import FirecrawlApp
 import os
@@ -43,20 +43,10 @@ def scraping(url, formats, includeTags):
 
 
 # Define the Azure OpenAI Client and Agent
-client = AOI(
-    azure_endpoint=endpoint_url,
-    azure_deployment=deployment_name,
-    api_key=api_key,
-    api_version=version_number,
-)
+client = make_agno_model()
 
 agent = Agent(
-    model=AOI(
-        id=model_name,
-        api_key=api_key,
-        azure_endpoint=endpoint_url,
-        azure_deployment=deployment_name
-    ),
+    model=make_agno_model(),
     description="You are a finance analyst that researches into income, balance sheet, cash flow statements, and annual reports of companies.",
     instructions=[
         "You have access to Scraping tool. You will be given a company link in Investing.com.",